@@ -1,9 +1,11 @@
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 from datetime import datetime
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.core.security import verify_supabase_jwt
+from app.core.timing import timing_phase
+from app.services.algorithm_executor import estimate_algorithm_work
 
 security = HTTPBearer()
 
@@ -13,7 +15,8 @@ def get_current_user(
 ) -> dict:
     token = credentials.credentials
     try:
-        payload = verify_supabase_jwt(token)
+        with timing_phase("auth"):
+            payload = verify_supabase_jwt(token)
         user_id = payload.get("sub")
         email = payload.get("email")
         
@@ -34,6 +37,9 @@ def get_current_user(
             "user_metadata": payload.get("user_metadata", {}),
             "app_metadata": payload.get("app_metadata", {}),
         }
+    except HTTPException:
+        # Keeps its status: a JWKS outage is a 503, not a bad token
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,6 +63,42 @@ def get_current_active_user(
     return current_user
 
 
+def is_admin(user: dict) -> bool:
+    # Same check as AuthService.is_user_admin, but app_metadata comes from the
+    # verified token instead of an admin API round trip
+    return (user.get("app_metadata") or {}).get("role") == "admin"
+
+
+def get_current_admin_user(
+    current_user: dict = Depends(get_current_active_user)
+) -> dict:
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+def charge_algorithm_work(request: Request, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    # RateLimitMiddleware charged one token on the way in; charge the rest of
+    # the estimated work now that the body is parsed
+    state = getattr(request.state, "rate_limit", None)
+    if state is None:
+        return
+    work = sum(estimate_algorithm_work(algorithm_type, input_data) for algorithm_type, input_data in items)
+    extra = state.limiter.work_cost(work) - 1
+    if extra <= 0:
+        return
+    state.decision = state.limiter.consume(state.key, extra)
+    if not state.decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=state.decision.headers()
+        )
+
+
 def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[dict]:
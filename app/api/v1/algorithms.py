@@ -1,63 +1,265 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from supabase import Client
+from contextlib import nullcontext
+from typing import AsyncIterator, List, Optional
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from supabase import AsyncClient
 
-from app.core.database import get_supabase_client
-from app.api.deps import get_current_active_user
+from app.core.config import settings
+from app.core.database import get_async_supabase_client
+from app.core.profiling import ProfilerBusyError, get_request_profile_store
+from app.core.responses import model_response
+from app.core.timing import start_phase
+from app.api.deps import charge_algorithm_work, get_current_active_user, get_current_admin_user, is_admin
 from app.schemas.algorithm import (
     AlgorithmRequest, 
     AlgorithmResult, 
+    AlgorithmBatchRequest,
+    AlgorithmBatchItem,
+    AlgorithmBatchResult,
     AlgorithmHistoryItem,
+    AlgorithmJob,
     AlgorithmType
 )
-from app.services.algorithm_service import AlgorithmService
+from app.services.algorithm_executor import AlgorithmExecutor
+from app.services.algorithm_service import HISTORY_COLUMNS, HISTORY_CURSOR_COLUMNS, AlgorithmService
+from app.services.job_queue import JobQueue, JobQueueFullError, get_job_queue
+from app.services.result_cache import ResultCache
+from app.services.single_flight import SingleFlight
+from app.utils.helpers import decode_cursor, encode_cursor
 
 router = APIRouter()
 
 
-@router.post("/process", response_model=AlgorithmResult)
+@router.post(
+    "/process",
+    response_model=AlgorithmResult,
+    responses={status.HTTP_202_ACCEPTED: {"model": AlgorithmJob}}
+)
 async def process_algorithm(
     request: AlgorithmRequest,
+    http_request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
-    supabase: Client = Depends(get_supabase_client)
+    supabase: AsyncClient = Depends(get_async_supabase_client),
+    job_queue: JobQueue = Depends(get_job_queue),
+    async_mode: bool = Query(False, description="Queue the request and return 202 with a pollable job id"),
+    profile: bool = Query(False, description="Admin only: profile this request, the profile id is returned in X-Profile-Id"),
+    x_profile: bool = Header(False, description="Admin only: same as ?profile=true")
 ):
+    charge_algorithm_work(http_request, [(request.algorithm_type.value, request.input_data)])
+    profile_requested = profile or x_profile
+    if profile_requested:
+        _check_profiling_allowed(current_user, async_mode)
+    
+    # Failed profiled requests still point at their profile
+    error_headers = {}
     try:
-        algorithm_service = AlgorithmService(supabase)
-        result = algorithm_service.process_algorithm(
-            algorithm_type=request.algorithm_type,
-            input_data=request.input_data,
-            user_id=current_user["id"]
+        if profile_requested:
+            # Inline, uncached and not coalesced, so the kernel itself shows up in the profile
+            algorithm_service = AlgorithmService(
+                supabase,
+                executor=AlgorithmExecutor(enabled=False),
+                result_cache=ResultCache(enabled=False),
+                single_flight=SingleFlight(enabled=False)
+            )
+        else:
+            algorithm_service = AlgorithmService(supabase)
+        if async_mode:
+            job = await algorithm_service.submit_algorithm(
+                algorithm_type=request.algorithm_type,
+                input_data=request.input_data,
+                user_id=current_user["id"],
+                job_queue=job_queue,
+                include_inputs=request.include_inputs,
+                fields=request.fields
+            )
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=jsonable_encoder(_job_response(job.to_dict())),
+                headers={"Location": f"{settings.API_V1_STR}/algorithms/jobs/{job.id}"}
+            )
+        
+        profiling = get_request_profile_store().profile(
+            current_user["id"], f"process {request.algorithm_type.value}"
+        ) if profile_requested else nullcontext()
+        with profiling as request_profile:
+            if request_profile is not None:
+                error_headers["X-Profile-Id"] = request_profile.id
+            result = await algorithm_service.process_algorithm(
+                algorithm_type=request.algorithm_type,
+                input_data=request.input_data,
+                user_id=current_user["id"],
+                include_inputs=request.include_inputs,
+                fields=request.fields
+            )
+        # Closed when the response starts, so it covers FastAPI's own encoding too
+        start_phase("serialize")
+        return model_response(
+            AlgorithmResult,
+            result,
+            response,
+            headers={"X-Cache": "HIT" if result.get("cache_hit") else "MISS", **error_headers}
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(e.errors(include_url=False, include_context=False)),
+            headers=error_headers or None
         )
-        return AlgorithmResult(**result)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+            detail=str(e),
+            headers=error_headers or None
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Algorithm processing failed: {str(e)}",
+            headers=error_headers or None
+        )
+
+
+def _check_profiling_allowed(current_user: dict, async_mode: bool) -> None:
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is disabled"
+        )
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling requires an admin account"
+        )
+    if async_mode:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profiling is only available for synchronous requests"
+        )
+
+
+@router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    current_user: dict = Depends(get_current_admin_user),
+    format: str = Query("json", pattern="^(json|pstats)$", description="json summary or a pstats file for snakeviz/pstats")
+):
+    request_profile = get_request_profile_store().get(profile_id)
+    if request_profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found on this worker"
+        )
+    if format == "pstats":
+        return Response(
+            content=request_profile.pstats_data,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+        )
+    return request_profile.to_dict()
+
+
+@router.post("/batch", response_model=AlgorithmBatchResult)
+async def process_algorithm_batch(
+    batch: AlgorithmBatchRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_active_user),
+    supabase: AsyncClient = Depends(get_async_supabase_client)
+):
+    charge_algorithm_work(http_request, [(item.algorithm_type.value, item.input_data) for item in batch.items])
+    try:
+        algorithm_service = AlgorithmService(supabase)
+        results = await algorithm_service.process_batch(
+            items=[item.model_dump() for item in batch.items],
+            user_id=current_user["id"]
+        )
+        items = [AlgorithmBatchItem(**item) for item in results]
+        completed = len([item for item in items if item.status == "completed"])
+        return AlgorithmBatchResult(
+            items=items,
+            total=len(items),
+            completed=completed,
+            failed=len(items) - completed
         )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Algorithm processing failed: {str(e)}"
+            detail=str(e)
         )
 
 
+@router.get("/jobs/{job_id}", response_model=AlgorithmJob)
+async def get_algorithm_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_active_user),
+    supabase: AsyncClient = Depends(get_async_supabase_client),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    algorithm_service = AlgorithmService(supabase)
+    job = await algorithm_service.get_job(job_id, current_user["id"], job_queue)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return _job_response(job)
+
+
+def _job_response(job: dict) -> AlgorithmJob:
+    return AlgorithmJob(
+        request_id=job["id"],
+        algorithm_type=job["algorithm_type"],
+        status=job["status"],
+        result=job.get("result"),
+        error=job.get("error"),
+        created_at=job.get("created_at"),
+        completed_at=job.get("completed_at")
+    )
+
+
 @router.get("/history", response_model=List[AlgorithmHistoryItem])
 async def get_algorithm_history(
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
-    supabase: Client = Depends(get_supabase_client),
+    supabase: AsyncClient = Depends(get_async_supabase_client),
     limit: int = Query(50, ge=1, le=100, description="Number of items to return"),
-    algorithm_type: AlgorithmType = Query(None, description="Filter by algorithm type")
+    algorithm_type: AlgorithmType = Query(None, description="Filter by algorithm type"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
 ):
+    try:
+        after = decode_cursor(cursor, len(HISTORY_CURSOR_COLUMNS)) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     try:
         algorithm_service = AlgorithmService(supabase)
-        history = algorithm_service.get_algorithm_history(
+        # One extra row tells us whether there is a next page
+        history = await algorithm_service.get_algorithm_history(
             user_id=current_user["id"],
-            limit=limit
+            limit=limit + 1,
+            algorithm_type=algorithm_type,
+            after=after
         )
         
-        # Filter by algorithm type if specified
-        if algorithm_type:
-            history = [item for item in history if item.get("algorithm_type") == algorithm_type]
+        if len(history) > limit:
+            history = history[:limit]
+            last = history[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor([last[column] for column in HISTORY_CURSOR_COLUMNS])
         
         return [AlgorithmHistoryItem(**item) for item in history]
     except Exception as e:
@@ -67,80 +269,124 @@ async def get_algorithm_history(
         )
 
 
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _export_ndjson(pages: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    async for rows in pages:
+        yield "".join(json.dumps(row, separators=(",", ":"), default=str) + "\n" for row in rows)
+
+
+def _csv_cell(value):
+    # input_data/result are JSON columns; keep them as JSON text in one cell
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+async def _export_csv(pages: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    columns = HISTORY_COLUMNS.split(",")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # Header goes out before the first query returns
+    yield buffer.getvalue()
+    async for rows in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(row.get(column)) for column in columns] for row in rows)
+        yield buffer.getvalue()
+
+
+@router.get("/export")
+async def export_algorithm_history(
+    current_user: dict = Depends(get_current_active_user),
+    supabase: AsyncClient = Depends(get_async_supabase_client),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    algorithm_type: AlgorithmType = Query(None, description="Filter by algorithm type")
+):
+    # Streams the full history page by page, so memory use doesn't depend on its size
+    algorithm_service = AlgorithmService(supabase)
+    pages = algorithm_service.iter_algorithm_history(
+        user_id=current_user["id"],
+        algorithm_type=algorithm_type,
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+    body = _export_csv(pages) if format == "csv" else _export_ndjson(pages)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="algorithm-history.{format}"'}
+    )
+
+
+# Static; app.main serves it pre-serialized with a strong ETag
+ALGORITHM_TYPES = {
+    "types": [
+        {
+            "name": "fibonacci",
+            "description": "Calculate Fibonacci numbers",
+            "input_schema": {
+                "n": "integer (0-10000000, up to 10^18 with modulus) - The nth Fibonacci number to calculate",
+                "include_sequence": "boolean (optional) - Return F(0)..F(n); defaults to true for n <= 100",
+                "modulus": "integer (optional, >=2) - Return values mod this number",
+                "start": "integer (optional) - First index of a sequence slice",
+                "count": "integer (optional, max 10000) - Length of a sequence slice"
+            }
+        },
+        {
+            "name": "prime_check",
+            "description": "Check if a number is prime",
+            "input_schema": {
+                "number": "integer (>=2) - The number to check for primality",
+                "rounds": "integer (optional, 1-128) - Miller-Rabin rounds above the deterministic range"
+            }
+        },
+        {
+            "name": "factorize",
+            "description": "Factorize an integer into primes",
+            "input_schema": {
+                "number": "integer (2 to 2^64) - The number to factorize"
+            }
+        },
+        {
+            "name": "sorting",
+            "description": "Sort an array of integers",
+            "input_schema": {
+                "array": "array of integers (max 1000000) - Array to sort",
+                "algorithm": "string (optional) - Sorting algorithm ('quicksort', 'mergesort')"
+            }
+        },
+        {
+            "name": "matrix_multiply",
+            "description": "Multiply two matrices",
+            "input_schema": {
+                "matrix_a": "2D array of integers - First matrix",
+                "matrix_b": "2D array of integers - Second matrix",
+                "backend": "string (optional) - 'numpy', 'python' or 'auto' (numpy when installed)"
+            }
+        }
+    ]
+}
+
+
 @router.get("/types")
 async def get_algorithm_types():
-    return {
-        "types": [
-            {
-                "name": "fibonacci",
-                "description": "Calculate Fibonacci numbers",
-                "input_schema": {
-                    "n": "integer (0-100) - The nth Fibonacci number to calculate"
-                }
-            },
-            {
-                "name": "prime_check",
-                "description": "Check if a number is prime",
-                "input_schema": {
-                    "number": "integer (>=2) - The number to check for primality"
-                }
-            },
-            {
-                "name": "sorting",
-                "description": "Sort an array of integers",
-                "input_schema": {
-                    "array": "array of integers (max 1000) - Array to sort",
-                    "algorithm": "string (optional) - Sorting algorithm ('quicksort', 'mergesort')"
-                }
-            },
-            {
-                "name": "matrix_multiply",
-                "description": "Multiply two matrices",
-                "input_schema": {
-                    "matrix_a": "2D array of integers - First matrix",
-                    "matrix_b": "2D array of integers - Second matrix"
-                }
-            }
-        ]
-    }
+    return ALGORITHM_TYPES
 
 
 @router.get("/stats")
 async def get_algorithm_stats(
     current_user: dict = Depends(get_current_active_user),
-    supabase: Client = Depends(get_supabase_client)
+    supabase: AsyncClient = Depends(get_async_supabase_client)
 ):
     try:
-        # Get algorithm usage statistics for the current user
-        response = supabase.table("algorithm_requests").select("algorithm_type, status").eq("user_id", current_user["id"]).execute()
-        
-        if not response.data:
-            return {
-                "total_requests": 0,
-                "completed_requests": 0,
-                "failed_requests": 0,
-                "algorithm_usage": {}
-            }
-        
-        requests = response.data
-        total_requests = len(requests)
-        completed_requests = len([r for r in requests if r["status"] == "completed"])
-        failed_requests = len([r for r in requests if r["status"] == "failed"])
-        
-        # Count usage by algorithm type
-        algorithm_usage = {}
-        for request in requests:
-            alg_type = request["algorithm_type"]
-            if alg_type not in algorithm_usage:
-                algorithm_usage[alg_type] = 0
-            algorithm_usage[alg_type] += 1
-        
-        return {
-            "total_requests": total_requests,
-            "completed_requests": completed_requests,
-            "failed_requests": failed_requests,
-            "algorithm_usage": algorithm_usage
-        }
+        # Aggregated in the database, so the cost doesn't grow with the user's history
+        algorithm_service = AlgorithmService(supabase)
+        return await algorithm_service.get_algorithm_stats(current_user["id"])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
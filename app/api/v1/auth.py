@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from supabase import Client, AsyncClient
 
-from app.core.database import get_supabase_client
+from app.core.database import get_supabase_client, get_async_supabase_client
 from app.api.deps import get_current_user, get_current_active_user
 from app.schemas.user import UserResponse, UserProfile, LoginRequest, SignupRequest, AuthResponse
 from app.services.auth_service import AuthService
+from app.services.profile_service import ProfileService
+from app.utils.helpers import compute_etag, etag_matches
 
 router = APIRouter()
 
@@ -16,77 +19,66 @@ async def get_current_user_info(
     return UserResponse(**current_user)
 
 
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+def _profile_response(profile: UserProfile, response: Response, if_none_match: Optional[str]):
+    # The ETag covers the whole body, email included, so a changed email
+    # claim in a new token also invalidates the client's copy
+    etag = compute_etag(profile.model_dump())
+    headers = {"ETag": etag, "Cache-Control": PROFILE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return profile
+
+
 @router.get("/profile", response_model=UserProfile)
 async def get_user_profile(
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
-    supabase: Client = Depends(get_supabase_client)
+    supabase: AsyncClient = Depends(get_async_supabase_client),
+    if_none_match: Optional[str] = Header(None)
 ):
     try:
-        # Get additional profile data from profiles table
-        response = supabase.table("profiles").select("*").eq("id", current_user["id"]).single().execute()
-        
-        if response.data:
-            profile_data = response.data
-            return UserProfile(
-                id=current_user["id"],
-                email=current_user["email"],
-                first_name=profile_data.get("first_name"),
-                last_name=profile_data.get("last_name"),
-                avatar_url=profile_data.get("avatar_url"),
-                preferences=profile_data.get("preferences")
-            )
-        else:
-            # Return basic profile if no extended profile exists
-            return UserProfile(
-                id=current_user["id"],
-                email=current_user["email"]
-            )
+        # Extended profile data from the profiles table, served from the
+        # per-user cache; a basic profile if no row exists
+        profile_service = ProfileService(supabase)
+        profile_data = await profile_service.get_profile(current_user["id"])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch profile: {str(e)}"
         )
+    
+    profile = UserProfile(id=current_user["id"], email=current_user["email"], **profile_data)
+    return _profile_response(profile, response, if_none_match)
 
 
 @router.put("/profile", response_model=UserProfile)
 async def update_user_profile(
     profile_data: dict,
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
-    supabase: Client = Depends(get_supabase_client)
+    supabase: AsyncClient = Depends(get_async_supabase_client)
 ):
     try:
-        # Update or insert profile data
-        profile_update = {
-            "id": current_user["id"],
-            "first_name": profile_data.get("first_name"),
-            "last_name": profile_data.get("last_name"),
-            "avatar_url": profile_data.get("avatar_url"),
-            "preferences": profile_data.get("preferences"),
-            "updated_at": "now()"
-        }
-        
-        response = supabase.table("profiles").upsert(profile_update).execute()
-        
-        if response.data:
-            updated_profile = response.data[0]
-            return UserProfile(
-                id=current_user["id"],
-                email=current_user["email"],
-                first_name=updated_profile.get("first_name"),
-                last_name=updated_profile.get("last_name"),
-                avatar_url=updated_profile.get("avatar_url"),
-                preferences=updated_profile.get("preferences")
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update profile"
-            )
+        # Update or insert profile data, writing through the profile cache
+        profile_service = ProfileService(supabase)
+        updated_profile = await profile_service.update_profile(current_user["id"], profile_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update profile: {str(e)}"
         )
+    
+    if updated_profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update profile"
+        )
+    profile = UserProfile(id=current_user["id"], email=current_user["email"], **updated_profile)
+    return _profile_response(profile, response, None)
 
 
 @router.post("/verify-token")
@@ -100,8 +92,10 @@ async def verify_user_token(
     }
 
 
+# login/signup use the sync auth client, so they are plain `def` routes and run in
+# FastAPI's threadpool instead of blocking the event loop
 @router.post("/login", response_model=AuthResponse)
-async def login(
+def login(
     login_data: LoginRequest,
     supabase: Client = Depends(get_supabase_client)
 ):
@@ -122,7 +116,7 @@ async def login(
 
 
 @router.post("/signup", response_model=AuthResponse)
-async def signup(
+def signup(
     signup_data: SignupRequest,
     supabase: Client = Depends(get_supabase_client)
 ):
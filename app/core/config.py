@@ -13,9 +13,20 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: Optional[str] = None
     
+    # Async Supabase HTTP pool (shared by every request on a worker)
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 100
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 20
+    SUPABASE_HTTP_TIMEOUT: float = 10.0
+    
     # JWT Configuration
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
+    # Set to the project's JWKS endpoint (e.g. https://<project>.supabase.co/auth/v1/.well-known/jwks.json)
+    # to also accept RS256/ES256 tokens; keys are cached in memory and refetched every JWT_JWKS_REFRESH_SECONDS
+    JWT_JWKS_URL: str = ""
+    JWT_JWKS_REFRESH_SECONDS: float = 600.0
+    JWT_JWKS_MIN_REFRESH_SECONDS: float = 30.0
+    JWT_CACHE_MAX_ENTRIES: int = 10000  # verified tokens kept until their exp, 0 = disabled
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # CORS Configuration - Simple string that gets split on comma
@@ -29,10 +40,82 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
     
-    # Rate Limiting
+    # Algorithm execution: kernels run in a process pool unless routed to
+    # "thread"/"inline" or their estimated work is below the inline threshold
+    ALGORITHM_POOL_ENABLED: bool = True
+    ALGORITHM_POOL_SIZE: int = 0  # 0 = os.cpu_count()
+    ALGORITHM_POOL_MAX_TASKS_PER_CHILD: int = 0  # 0 = never recycle workers
+    ALGORITHM_INLINE_WORK_THRESHOLD: int = 20000
+    ALGORITHM_EXECUTOR_ROUTES: str = "fibonacci:process,prime_check:process,sorting:process,matrix_multiply:process"
+    
+    # Result cache for deterministic algorithm outputs
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_TTL_SECONDS: float = 3600.0
+    # Identical computations already running in this process are joined, not repeated
+    SINGLE_FLIGHT_ENABLED: bool = True
+    
+    # Per-user profile cache behind GET /auth/profile (per worker process)
+    PROFILE_CACHE_ENABLED: bool = True
+    PROFILE_CACHE_MAX_ENTRIES: int = 10000
+    PROFILE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    PROFILE_CACHE_TTL_SECONDS: float = 60.0
+    
+    # Background job queue for /algorithms/process?async_mode=true
+    JOB_QUEUE_WORKERS: int = 4
+    JOB_QUEUE_MAX_SIZE: int = 1000
+    JOB_QUEUE_RETENTION: int = 10000  # finished jobs kept in memory for polling
+    JOB_QUEUE_DRAIN_TIMEOUT: float = 10.0  # seconds shutdown waits before failing unfinished jobs
+    
+    # Write-behind audit logging: /algorithms/process returns once the result
+    # is computed and its algorithm_requests row is inserted later, in bulk
+    AUDIT_WRITE_BEHIND_ENABLED: bool = False
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_FLUSH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_ENQUEUE_TIMEOUT: float = 0.05  # wait this long for queue space before dropping a row
+    
+    # HTTP caching: static routes are served pre-serialized with strong ETags,
+    # /history and /stats get weak ETags from the user's latest request
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_STATIC_MAX_AGE: int = 3600
+    
+    # Response encoding: "auto" uses orjson when installed; compression is
+    # negotiated per request (br needs the brotli package)
+    JSON_RESPONSE_BACKEND: str = "auto"  # auto | orjson | json
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: str = "br,gzip"  # server preference order
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # Prometheus metrics at /metrics; keep it off the public network. Set
+    # PROMETHEUS_MULTIPROC_DIR when running several worker processes.
+    METRICS_ENABLED: bool = True
+    
+    # Server-Timing response header with auth/db_insert/compute/db_update/
+    # serialize phases; it reveals backend timings, so disable it if that matters
+    SERVER_TIMING_ENABLED: bool = True
+    
+    # Admin-only per-request profiling (?profile=true or X-Profile: true on
+    # /algorithms/process); profiles are kept in memory per worker process
+    PROFILING_ENABLED: bool = True
+    PROFILING_MAX_STORED: int = 50
+    PROFILING_STATS_LIMIT: int = 40  # functions listed in the text report
+    
+    # History export: rows fetched per keyset page while streaming
+    EXPORT_CHUNK_SIZE: int = 500
+    
+    # Rate Limiting: per-user (JWT sub, else client IP) token buckets holding
+    # RATE_LIMIT_REQUESTS tokens, refilled over RATE_LIMIT_WINDOW seconds.
+    # Every API request costs one token; algorithm requests cost one token per
+    # RATE_LIMIT_WORK_PER_TOKEN units of estimated work. Buckets are per process.
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60
+    RATE_LIMIT_WORK_PER_TOKEN: int = 1_000_000
+    RATE_LIMIT_SHARDS: int = 64
     
     class Config:
         env_file = ".env"
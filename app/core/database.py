@@ -1,8 +1,16 @@
-from supabase import create_client, Client
+from typing import Optional
+import httpx
+from supabase import create_client, acreate_client, Client, AsyncClient, AsyncClientOptions
 from app.core.config import settings
 
 supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
+# Shared async client and connection pool, created lazily on the running event loop
+_async_http_client: Optional[httpx.AsyncClient] = None
+_async_supabase: Optional[AsyncClient] = None
+# None means real network I/O; the load harness installs an in-process fake here
+_async_http_transport: Optional[httpx.AsyncBaseTransport] = None
+
 
 def get_supabase_client() -> Client:
     return supabase
@@ -11,4 +19,45 @@ def get_supabase_client() -> Client:
 def get_service_client() -> Client:
     if settings.SUPABASE_SERVICE_KEY:
         return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
-    return supabase
\ No newline at end of file
+    return supabase
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = httpx.AsyncClient(
+            timeout=settings.SUPABASE_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            ),
+            follow_redirects=True,
+            http2=True,
+            transport=_async_http_transport,
+        )
+    return _async_http_client
+
+
+def set_async_http_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    # Takes effect for clients created afterwards; call close_async_clients() first
+    global _async_http_transport
+    _async_http_transport = transport
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    global _async_supabase
+    if _async_supabase is None:
+        _async_supabase = await acreate_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=AsyncClientOptions(httpx_client=get_async_http_client()),
+        )
+    return _async_supabase
+
+
+async def close_async_clients() -> None:
+    global _async_http_client, _async_supabase
+    _async_supabase = None
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
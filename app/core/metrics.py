@@ -0,0 +1,151 @@
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Pattern, Sequence, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiling import get_active_profile
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COMPUTE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+DB_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+ALGORITHM_COMPUTE_SECONDS = Histogram(
+    "algorithm_compute_seconds",
+    "Kernel wall time as seen by the service, including executor hand-off",
+    ["algorithm_type", "size", "mode"],
+    buckets=COMPUTE_BUCKETS,
+)
+ALGORITHMS_IN_FLIGHT = Gauge(
+    "algorithm_computations_in_flight",
+    "Kernel runs currently executing",
+    ["algorithm_type"],
+    multiprocess_mode="livesum",
+)
+SUPABASE_CALL_SECONDS = Histogram(
+    "supabase_call_duration_seconds",
+    "Supabase/PostgREST call latency",
+    ["table", "operation"],
+    buckets=DB_BUCKETS,
+)
+SUPABASE_CALL_ERRORS = Counter(
+    "supabase_call_errors_total",
+    "Supabase/PostgREST calls that raised",
+    ["table", "operation"],
+)
+RESULT_CACHE_LOOKUPS = Counter(
+    "result_cache_lookups_total",
+    "Algorithm result cache lookups",
+    ["result"],
+)
+ALGORITHM_COALESCED = Counter(
+    "algorithm_coalesced_total",
+    "Computations served by joining an identical one already in flight",
+    ["algorithm_type"],
+)
+AUDIT_LOG_ROWS = Counter(
+    "audit_log_rows_total",
+    "Write-behind audit rows by outcome",
+    ["outcome"],
+)
+
+
+def size_bucket(work: int) -> str:
+    # Decade of the estimated work, so label cardinality stays tiny
+    return f"1e{min(int(math.log10(max(work, 1))), 12)}"
+
+
+@contextmanager
+def track_supabase_call(table: str, operation: str) -> Iterator[None]:
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        SUPABASE_CALL_ERRORS.labels(table, operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        SUPABASE_CALL_SECONDS.labels(table, operation).observe(elapsed)
+        profile = get_active_profile()
+        if profile is not None:
+            profile.record_supabase_call(table, operation, elapsed, error)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # One registry aggregated over every uvicorn/gunicorn worker
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: two perf_counter calls, a gauge inc/dec and one
+    # histogram observation per request
+    def __init__(self, app: ASGIApp, openapi_app=None, extra_paths: Sequence[str] = ()):
+        self.app = app
+        self.openapi_app = openapi_app
+        self.extra_paths = tuple(extra_paths)
+        self._routes: Optional[List[Tuple[Pattern, str]]] = None
+    
+    def route_template(self, path: str) -> str:
+        # Label by template ("/algorithms/jobs/{job_id}"), never the raw path
+        if self._routes is None:
+            templates = list(self.extra_paths)
+            if self.openapi_app is not None:
+                templates += list(self.openapi_app.openapi().get("paths", {}))
+            self._routes = [(compile_path(template)[0], template) for template in templates]
+        for regex, template in self._routes:
+            if regex.match(path):
+                return template
+        return "unmatched"
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(
+                scope["method"], self.route_template(scope["path"]), str(status_code)
+            ).observe(time.perf_counter() - start)
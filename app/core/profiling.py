@@ -0,0 +1,119 @@
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.utils.helpers import generate_uuid
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+class RequestProfile:
+    # One profiled request: cProfile stats plus every Supabase call it made
+    def __init__(self, user_id: str, label: str):
+        self.id = generate_uuid()
+        self.user_id = user_id
+        self.label = label
+        self.created_at = datetime.utcnow()
+        self.duration_ms: Optional[float] = None
+        self.supabase_calls: List[Dict[str, Any]] = []
+        self.pstats_data: bytes = b""
+        self.stats_text = ""
+        self._profiler = cProfile.Profile()
+    
+    def record_supabase_call(self, table: str, operation: str, seconds: float, error: Optional[str]) -> None:
+        self.supabase_calls.append({
+            "table": table,
+            "operation": operation,
+            "duration_ms": round(seconds * 1000, 3),
+            "error": error,
+        })
+    
+    def _finish(self, seconds: float, stats_limit: int) -> None:
+        self.duration_ms = round(seconds * 1000, 3)
+        self._profiler.create_stats()
+        # Same format as Profile.dump_stats, so snakeviz/pstats can load it
+        self.pstats_data = marshal.dumps(self._profiler.stats)
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(stats_limit)
+        self.stats_text = stream.getvalue()
+        self._profiler = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "label": self.label,
+            "created_at": self.created_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "supabase_calls": self.supabase_calls,
+            "stats": self.stats_text,
+        }
+
+
+class RequestProfileStore:
+    # Per-process and in memory: a profile is only retrievable from the worker
+    # that served the profiled request
+    def __init__(self, max_entries: int = 50, stats_limit: int = 40):
+        self.max_entries = max_entries
+        self.stats_limit = stats_limit
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        # cProfile installs one profile hook per interpreter (3.12+), so only
+        # one request can be profiled at a time
+        self._busy = threading.Lock()
+    
+    @contextmanager
+    def profile(self, user_id: str, label: str) -> Iterator[RequestProfile]:
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusyError("Another request is being profiled, try again shortly")
+        try:
+            profile = RequestProfile(user_id, label)
+            token = _active_profile.set(profile)
+            start = time.perf_counter()
+            # Deterministic, so anything else the event loop runs meanwhile shows up too
+            profile._profiler.enable()
+            try:
+                yield profile
+            finally:
+                profile._profiler.disable()
+                _active_profile.reset(token)
+                profile._finish(time.perf_counter() - start, self.stats_limit)
+                # Failed requests are kept too: those are often the interesting ones
+                self._profiles[profile.id] = profile
+                while len(self._profiles) > self.max_entries:
+                    self._profiles.popitem(last=False)
+        finally:
+            self._busy.release()
+    
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def get_active_profile() -> Optional[RequestProfile]:
+    return _active_profile.get()
+
+
+_profile_store: Optional[RequestProfileStore] = None
+
+
+def get_request_profile_store() -> RequestProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = RequestProfileStore(
+            max_entries=settings.PROFILING_MAX_STORED,
+            stats_limit=settings.PROFILING_STATS_LIMIT,
+        )
+    return _profile_store
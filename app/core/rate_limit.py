@@ -0,0 +1,176 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import verify_supabase_jwt_async
+
+
+class RateLimitDecision:
+    __slots__ = ("allowed", "limit", "window", "remaining", "reset_after", "retry_after")
+    
+    def __init__(self, allowed: bool, limit: int, window: int, remaining: float, reset_after: float, retry_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.window = window
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+    
+    def headers(self) -> Dict[str, str]:
+        # draft-ietf-httpapi-ratelimit-headers; Reset is seconds until the bucket is full
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(int(self.remaining)),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+            "RateLimit-Policy": f"{self.limit};w={self.window}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (tokens, last refill time)
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+
+
+class TokenBucketLimiter:
+    # capacity tokens per window, refilled continuously. Buckets are spread
+    # over independently locked shards so concurrent callers rarely contend.
+    def __init__(
+        self,
+        capacity: int = 100,
+        window: int = 60,
+        work_per_token: int = 1_000_000,
+        shards: int = 64,
+        max_keys_per_shard: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.window = window
+        self.rate = capacity / window
+        self.work_per_token = work_per_token
+        self.max_keys_per_shard = max_keys_per_shard
+        self.clock = clock
+        self._shards: List[_Shard] = [_Shard() for _ in range(shards)]
+    
+    def work_cost(self, work: int) -> int:
+        return max(math.ceil(work / self.work_per_token), 1)
+    
+    def consume(self, key: str, cost: float = 1) -> RateLimitDecision:
+        # A request bigger than the bucket could never pass; it costs a full bucket instead
+        cost = min(cost, self.capacity)
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            now = self.clock()
+            tokens, updated = shard.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            shard.buckets[key] = (tokens, now)
+            if len(shard.buckets) > self.max_keys_per_shard:
+                self._prune(shard, now)
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.capacity,
+            window=self.window,
+            remaining=tokens,
+            reset_after=(self.capacity - tokens) / self.rate,
+            retry_after=0 if allowed else (cost - tokens) / self.rate,
+        )
+    
+    def _prune(self, shard: _Shard, now: float) -> None:
+        # A bucket that has refilled completely is the same as no bucket
+        full = [
+            key for key, (tokens, updated) in shard.buckets.items()
+            if tokens + (now - updated) * self.rate >= self.capacity
+        ]
+        for key in full:
+            del shard.buckets[key]
+
+
+class RateLimitState:
+    # Stored in request.state so routes can charge for the work they are asked to do
+    __slots__ = ("limiter", "key", "decision")
+    
+    def __init__(self, limiter: TokenBucketLimiter, key: str, decision: RateLimitDecision):
+        self.limiter = limiter
+        self.key = key
+        self.decision = decision
+
+
+async def client_key(scope: Scope) -> str:
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            # Verified tokens are cached, so this is usually a hash and a dict lookup
+            user_id = (await verify_supabase_jwt_async(token)).get("sub")
+        except Exception:
+            user_id = None
+        if user_id:
+            return f"user:{user_id}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    # Charges one token per request; algorithm routes charge the rest of their
+    # estimated work through charge_algorithm_work once the body is parsed
+    def __init__(self, app: ASGIApp, limiter: TokenBucketLimiter, path_prefix: str = ""):
+        self.app = app
+        self.limiter = limiter
+        self.path_prefix = path_prefix
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        
+        key = await client_key(scope)
+        decision = self.limiter.consume(key)
+        if not decision.allowed:
+            response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers=decision.headers())
+            await response(scope, receive, send)
+            return
+        
+        state = RateLimitState(self.limiter, key, decision)
+        scope.setdefault("state", {})["rate_limit"] = state
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                # A route that throttled the request has already set them
+                for name, value in state.decision.headers().items():
+                    headers.setdefault(name, value)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
+
+
+_rate_limiter: Optional[TokenBucketLimiter] = None
+
+
+def get_rate_limiter() -> Optional[TokenBucketLimiter]:
+    global _rate_limiter
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucketLimiter(
+            capacity=settings.RATE_LIMIT_REQUESTS,
+            window=settings.RATE_LIMIT_WINDOW,
+            work_per_token=settings.RATE_LIMIT_WORK_PER_TOKEN,
+            shards=settings.RATE_LIMIT_SHARDS,
+        )
+    return _rate_limiter
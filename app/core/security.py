@@ -1,22 +1,214 @@
-from typing import Dict, Any
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
 import jwt
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
 
-def verify_supabase_jwt(token: str) -> Dict[str, Any]:
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.JWT_SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM],
-            options={"verify_aud": False}
+
+class JWKSUnavailableError(Exception):
+    pass
+
+
+class VerifiedTokenCache:
+    # Bounded LRU of verified claims keyed by a digest of the token, so the
+    # raw bearer token is never kept in memory; entries die at the token's exp
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+    
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            # Tokens without exp never expire, so they are re-verified every time
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(exp), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class JWKSKeySet:
+    # Public keys for RS256/ES256 tokens, fetched from the JWKS endpoint and
+    # kept in memory; refreshed on a timer or when an unknown kid shows up
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 600.0,
+        min_refresh_interval: float = 30.0,
+        fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.clock = clock
+        self._fetch = fetch or self._fetch_jwks
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._last_error: Optional[Exception] = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _fetch_jwks(url: str) -> Dict[str, Any]:
+        response = httpx.get(url, timeout=settings.SUPABASE_HTTP_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    
+    def refresh(self) -> None:
+        # The attempt counts even if it fails, so retries back off too
+        self._attempted_at = self.clock()
+        jwks = self._fetch(self.url)
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            try:
+                key = jwt.PyJWK.from_dict(jwk)
+            except jwt.PyJWTError:
+                # Skip key types this PyJWT build can't load
+                continue
+            keys[jwk.get("kid") or ""] = key
+        self._keys = keys
+        self._fetched_at = self._attempted_at
+        self._last_error = None
+    
+    def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        kid = kid or ""
+        with self._lock:
+            now = self.clock()
+            stale = self._fetched_at is None or now - self._fetched_at >= self.refresh_interval
+            # Unknown kids (key rotation) and failed fetches retry at most every
+            # min_refresh_interval, so neither can force a fetch per request
+            if self._attempted_at is None or (
+                (stale or kid not in self._keys) and now - self._attempted_at >= self.min_refresh_interval
+            ):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    # Keep serving the last good keys through a JWKS outage
+                    self._last_error = e
+            key = self._keys.get(kid)
+            if key is None and not self._keys and self._last_error is not None:
+                raise JWKSUnavailableError(f"JWKS unavailable: {self._last_error}")
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid or 'missing kid'}")
+        return key
+
+
+def allowed_algorithms() -> Tuple[str, ...]:
+    if settings.JWT_JWKS_URL:
+        return (settings.JWT_ALGORITHM,) + tuple(a for a in ASYMMETRIC_ALGORITHMS if a != settings.JWT_ALGORITHM)
+    return (settings.JWT_ALGORITHM,)
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+_jwks_key_set: Optional[JWKSKeySet] = None
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = VerifiedTokenCache(max_entries=settings.JWT_CACHE_MAX_ENTRIES)
+    return _token_cache
+
+
+def get_jwks_key_set() -> Optional[JWKSKeySet]:
+    global _jwks_key_set
+    if not settings.JWT_JWKS_URL:
+        return None
+    if _jwks_key_set is None:
+        _jwks_key_set = JWKSKeySet(
+            settings.JWT_JWKS_URL,
+            refresh_interval=settings.JWT_JWKS_REFRESH_SECONDS,
+            min_refresh_interval=settings.JWT_JWKS_MIN_REFRESH_SECONDS,
         )
+    return _jwks_key_set
+
+
+def _decode(token: str) -> Dict[str, Any]:
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm not in allowed_algorithms():
+        raise jwt.InvalidAlgorithmError(f"The specified alg value is not allowed: {algorithm}")
+    
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        key_set = get_jwks_key_set()
+        if key_set is None:
+            raise jwt.InvalidAlgorithmError(f"No JWKS configured for {algorithm}")
+        key = key_set.get_signing_key(header.get("kid")).key
+    else:
+        key = settings.JWT_SECRET_KEY
+    
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        options={"verify_aud": False}
+    )
+
+
+def verify_supabase_jwt(token: str) -> Dict[str, Any]:
+    cache = get_token_cache()
+    payload = cache.get(token)
+    if payload is not None:
         return payload
+    try:
+        payload = _decode(token)
     except jwt.InvalidTokenError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid Supabase token: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+    except JWKSUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    cache.set(token, payload)
+    return payload
+
+
+async def verify_supabase_jwt_async(token: str) -> Dict[str, Any]:
+    # For callers on the event loop: cache hits stay inline, a miss may fetch
+    # the JWKS (blocking I/O under a lock), so it runs in the threadpool
+    payload = get_token_cache().get(token)
+    if payload is not None:
+        return payload
+    return await run_in_threadpool(verify_supabase_jwt, token)
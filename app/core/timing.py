@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ServerTiming:
+    # Phase durations for one request, rendered as a Server-Timing header
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._open: Optional[Tuple[str, float]] = None
+    
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+    
+    def start(self, name: str) -> None:
+        # Open-ended phase, closed when the response starts; used for
+        # serialization, which FastAPI does after the endpoint returns
+        self.close()
+        self._open = (name, time.perf_counter())
+    
+    def close(self) -> None:
+        if self._open is not None:
+            name, start = self._open
+            self.add(name, time.perf_counter() - start)
+            self._open = None
+    
+    def header_value(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items())
+
+
+_current_timing: ContextVar[Optional[ServerTiming]] = ContextVar("server_timing", default=None)
+
+
+@contextmanager
+def timing_phase(name: str) -> Iterator[None]:
+    timing = _current_timing.get()
+    if timing is None:
+        # Background jobs and scripts: nothing to report to
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+def start_phase(name: str) -> None:
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.start(name)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timing = ServerTiming()
+        token = _current_timing.set(timing)
+        start = time.perf_counter()
+        
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timing.close()
+                timing.add("total", time.perf_counter() - start)
+                MutableHeaders(scope=message).append("Server-Timing", timing.header_value())
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
@@ -1,32 +1,174 @@
-from fastapi import FastAPI
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.api.v1.algorithms import ALGORITHM_TYPES
 from app.api.v1.router import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.database import close_async_clients, get_async_supabase_client
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.rate_limit import RateLimitMiddleware, get_rate_limiter
+from app.core.responses import get_default_response_class
+from app.core.security import verify_supabase_jwt_async
+from app.core.timing import ServerTimingMiddleware
+from app.services.algorithm_service import AlgorithmService
+from app.services.algorithm_executor import shutdown_algorithm_executor
+from app.services.audit_logger import shutdown_audit_logger
+from app.services.job_queue import shutdown_job_queue
+from app.utils.helpers import compute_etag, etag_matches
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await shutdown_job_queue()
+    await shutdown_audit_logger()
+    shutdown_algorithm_executor()
+    await close_async_clients()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description=settings.DESCRIPTION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=get_default_response_class(),
+    lifespan=lifespan
 )
 
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+ROOT_MESSAGE = {"message": "FastAPI Supabase Backend"}
+
+# path -> (body, strong ETag), serialized once at import
+STATIC_ROUTES: Dict[str, Tuple[bytes, str]] = {}
+
+
+def precompute_static_route(path: str, content: dict) -> None:
+    body = JSONResponse(content).body
+    STATIC_ROUTES[path] = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+precompute_static_route("/", ROOT_MESSAGE)
+precompute_static_route(f"{settings.API_V1_STR}/algorithms/types", ALGORITHM_TYPES)
+
+# Per-user routes whose body only changes when the user's algorithm_requests do
+USER_VERSIONED_ROUTES = {
+    f"{settings.API_V1_STR}/algorithms/history",
+    f"{settings.API_V1_STR}/algorithms/stats",
+}
+
+
+async def user_route_etag(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        # Verified tokens are cached, so this rarely does more than a dict lookup
+        user_id = (await verify_supabase_jwt_async(token)).get("sub")
+    except Exception:
+        # Invalid token or JWKS outage: the handler's auth reports it
+        return None
+    if not user_id:
+        return None
+    try:
+        supabase = await get_async_supabase_client()
+        version = await AlgorithmService(supabase).get_history_version(user_id)
+    except Exception:
+        # Let the handler run and report the error
+        return None
+    return compute_etag([user_id, request.url.path, request.url.query, version], weak=True)
+
+
+@app.middleware("http")
+async def http_cache(request: Request, call_next):
+    if not settings.HTTP_CACHE_ENABLED or request.method != "GET":
+        return await call_next(request)
+    
+    path = request.url.path
+    if_none_match = request.headers.get("if-none-match")
+    static = STATIC_ROUTES.get(path)
+    if static is not None:
+        body, etag = static
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.HTTP_STATIC_MAX_AGE}"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+    
+    if path in USER_VERSIONED_ROUTES:
+        etag = await user_route_etag(request)
+        if etag is None:
+            return await call_next(request)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        # The version is read before the handler runs, so a body can only be
+        # newer than its ETag, never older; the next request then misses
+        response = await call_next(request)
+        if response.status_code == status.HTTP_200_OK:
+            response.headers.update(headers)
+        return response
+    
+    return await call_next(request)
+
+
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        encodings=[e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",") if e.strip()],
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+if settings.RATE_LIMIT_ENABLED:
+    # Only the API is limited; health checks, docs and /metrics are not
+    app.add_middleware(RateLimitMiddleware, limiter=get_rate_limiter(), path_prefix=settings.API_V1_STR)
+
+if settings.METRICS_ENABLED:
+    # Outside the cache and compression so their work is part of the latency
+    app.add_middleware(MetricsMiddleware, openapi_app=app, extra_paths=["/metrics"])
+
+# Added last so it is the outermost middleware and cached responses get CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "ETag",
+        "Server-Timing",
+        "X-Profile-Id",
+        "RateLimit-Limit",
+        "RateLimit-Remaining",
+        "RateLimit-Reset",
+        "RateLimit-Policy",
+        "Retry-After",
+    ],
 )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
-
 
 @app.get("/")
 async def root():
-    return {"message": "FastAPI Supabase Backend"}
+    return ROOT_MESSAGE
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        body, content_type = render_metrics()
+        return Response(body, media_type=content_type)
@@ -33,7 +33,7 @@ class AlgorithmRequest:
         self.created_at = created_at or datetime.utcnow()
         self.completed_at = completed_at
     
-    def mark_processing(self):
+    def mark_processing(self) -> None:
         self.status = AlgorithmStatus.PROCESSING
     
     def mark_completed(self, result: Dict[str, Any]):
@@ -1,5 +1,5 @@
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from enum import Enum
 
@@ -7,6 +7,7 @@ from enum import Enum
 class AlgorithmType(str, Enum):
     FIBONACCI = "fibonacci"
     PRIME_CHECK = "prime_check"
+    FACTORIZE = "factorize"
     SORTING = "sorting"
     MATRIX_MULTIPLY = "matrix_multiply"
 
@@ -21,6 +22,8 @@ class AlgorithmStatus(str, Enum):
 class AlgorithmRequest(BaseModel):
     algorithm_type: AlgorithmType
     input_data: Dict[str, Any]
+    include_inputs: bool = Field(True, description="Echo inputs (original array, input matrices) in the result")
+    fields: Optional[List[str]] = Field(None, description="Only return and store these result keys")
     
     class Config:
         json_schema_extra = {
@@ -31,22 +34,80 @@ class AlgorithmRequest(BaseModel):
         }
 
 
+FIBONACCI_MAX_N = 10_000_000
+FIBONACCI_MAX_N_MODULAR = 10**18
+FIBONACCI_MAX_SEQUENCE_LENGTH = 10_000
+FIBONACCI_AUTO_SEQUENCE_MAX_N = 100
+
+
 class FibonacciInput(BaseModel):
-    n: int = Field(..., ge=0, le=100, description="Fibonacci number to calculate")
+    n: int = Field(10, ge=0, le=FIBONACCI_MAX_N_MODULAR, description="Fibonacci number to calculate")
+    include_sequence: Optional[bool] = Field(
+        None, description=f"Return F(0)..F(n); defaults to true only for n <= {FIBONACCI_AUTO_SEQUENCE_MAX_N}"
+    )
+    modulus: Optional[int] = Field(None, ge=2, description="Return every value mod this number")
+    start: Optional[int] = Field(None, ge=0, description="First index of a sequence slice")
+    count: Optional[int] = Field(
+        None, ge=1, le=FIBONACCI_MAX_SEQUENCE_LENGTH, description="Length of a sequence slice starting at start"
+    )
+    
+    @model_validator(mode="after")
+    def check_limits(self) -> "FibonacciInput":
+        if self.include_sequence and self.n >= FIBONACCI_MAX_SEQUENCE_LENGTH:
+            raise ValueError(f"include_sequence requires n < {FIBONACCI_MAX_SEQUENCE_LENGTH}; use start/count for slices")
+        if self.start is not None and self.start > FIBONACCI_MAX_N_MODULAR:
+            raise ValueError(f"start must be <= {FIBONACCI_MAX_N_MODULAR}")
+        if self.modulus is None:
+            # Without a modulus every value is a big integer that has to be
+            # computed, held and serialized
+            if self.n > FIBONACCI_MAX_N:
+                raise ValueError(f"n must be <= {FIBONACCI_MAX_N} unless a modulus is given")
+            slice_end = (self.start or 0) + (self.count or 1) - 1
+            if self.count is not None and slice_end > FIBONACCI_MAX_SEQUENCE_LENGTH:
+                raise ValueError(f"sequence slices must end at index <= {FIBONACCI_MAX_SEQUENCE_LENGTH} unless a modulus is given")
+        return self
+
+
+# Miller-Rabin costs grow with the cube of the bit length; 128 rounds on a
+# 512-bit number take about 0.1 s
+PRIME_CHECK_MAX_NUMBER = 2**512
 
 
 class PrimeCheckInput(BaseModel):
-    number: int = Field(..., ge=2, description="Number to check for primality")
+    number: int = Field(..., ge=2, le=PRIME_CHECK_MAX_NUMBER, description="Number to check for primality")
+    rounds: int = Field(40, ge=1, le=128, description="Miller-Rabin rounds for numbers beyond the deterministic range")
+
+
+FACTORIZE_MAX_NUMBER = 2**64
+
+
+class FactorizeInput(BaseModel):
+    number: int = Field(..., ge=2, le=FACTORIZE_MAX_NUMBER, description="Number to factorize")
+
+
+SORTING_MAX_LENGTH = 1_000_000
 
 
 class SortingInput(BaseModel):
-    array: List[int] = Field(..., max_length=1000, description="Array of integers to sort")
-    algorithm: str = Field("quicksort", description="Sorting algorithm to use")
+    array: List[int] = Field(..., max_length=SORTING_MAX_LENGTH, description="Array of integers to sort")
+    algorithm: Literal["quicksort", "mergesort", "timsort"] = Field("quicksort", description="Sorting algorithm to use")
 
 
 class MatrixMultiplyInput(BaseModel):
     matrix_a: List[List[int]] = Field(..., description="First matrix")
     matrix_b: List[List[int]] = Field(..., description="Second matrix")
+    backend: Literal["auto", "numpy", "python"] = Field("auto", description="'numpy' or 'python'; 'auto' uses numpy when installed")
+    
+    @model_validator(mode="after")
+    def check_shapes(self) -> "MatrixMultiplyInput":
+        for name, matrix in (("matrix_a", self.matrix_a), ("matrix_b", self.matrix_b)):
+            if not matrix or not matrix[0]:
+                raise ValueError(f"{name} must be non-empty")
+            if any(len(row) != len(matrix[0]) for row in matrix):
+                raise ValueError(f"{name} must be rectangular")
+        if len(self.matrix_a[0]) != len(self.matrix_b):
+            raise ValueError("Matrix dimensions are incompatible for multiplication")
+        return self
 
 
 class AlgorithmResult(BaseModel):
@@ -60,6 +121,39 @@ class AlgorithmResult(BaseModel):
         from_attributes = True
 
 
+class AlgorithmJob(BaseModel):
+    request_id: str
+    algorithm_type: AlgorithmType
+    status: AlgorithmStatus
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+BATCH_MAX_ITEMS = 500
+
+
+class AlgorithmBatchRequest(BaseModel):
+    items: List[AlgorithmRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class AlgorithmBatchItem(BaseModel):
+    index: int
+    request_id: str
+    algorithm_type: AlgorithmType
+    status: AlgorithmStatus
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class AlgorithmBatchResult(BaseModel):
+    items: List[AlgorithmBatchItem]
+    total: int
+    completed: int
+    failed: int
+
+
 class AlgorithmHistoryItem(BaseModel):
     id: str
     user_id: str
@@ -70,6 +164,7 @@ class AlgorithmHistoryItem(BaseModel):
     error: Optional[str] = None
     created_at: datetime
     completed_at: Optional[datetime] = None
+    compute_ms: Optional[float] = None
     
     class Config:
         from_attributes = True
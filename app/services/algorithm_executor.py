@@ -0,0 +1,158 @@
+import asyncio
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import ALGORITHM_COMPUTE_SECONDS, ALGORITHMS_IN_FLIGHT, size_bucket
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+EXECUTION_MODES = (INLINE, THREAD, PROCESS)
+
+AlgorithmKernel = Callable[[str, Dict[str, Any]], Dict[str, Any]]
+
+
+# Rough count of elementary operations a request will cost
+def estimate_algorithm_work(algorithm_type: str, input_data: Dict[str, Any]) -> int:
+    try:
+        if algorithm_type == "fibonacci":
+            n = int(input_data.get("n", 10))
+            count = int(input_data.get("count") or 0)
+            if input_data.get("modulus"):
+                # Fast doubling mod m costs O(log n) small multiplications
+                return max(n.bit_length() + count, 1)
+            return max(n + count, 1)
+        if algorithm_type == "prime_check":
+            # Trial division by a small table, then a fixed number of modpows
+            number = int(input_data.get("number") or 0)
+            return max(number.bit_length() ** 2, 1)
+        if algorithm_type == "factorize":
+            # Pollard's rho needs about n^(1/4) steps
+            number = int(input_data.get("number") or 0)
+            return max(math.isqrt(math.isqrt(max(number, 0))), 1)
+        if algorithm_type == "sorting":
+            length = len(input_data.get("array") or [])
+            return max(int(length * math.log2(length + 1)), 1)
+        if algorithm_type == "matrix_multiply":
+            matrix_a = input_data.get("matrix_a") or [[]]
+            matrix_b = input_data.get("matrix_b") or [[]]
+            return max(len(matrix_a) * len(matrix_a[0]) * len(matrix_b[0]), 1)
+    except (TypeError, ValueError, IndexError):
+        pass
+    return 1
+
+
+# Parse "sorting:process,fibonacci:inline" into a routing table
+def parse_routes(routes: str) -> Dict[str, str]:
+    table: Dict[str, str] = {}
+    for entry in routes.split(","):
+        if not entry.strip():
+            continue
+        algorithm_type, _, mode = entry.partition(":")
+        mode = mode.strip() or PROCESS
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}' for {algorithm_type.strip()}")
+        table[algorithm_type.strip()] = mode
+    return table
+
+
+class AlgorithmExecutor:
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_workers: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = None,
+        routes: Optional[Dict[str, str]] = None,
+        inline_threshold: int = 0,
+        default_mode: str = PROCESS,
+    ):
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.routes = routes or {}
+        self.inline_threshold = inline_threshold
+        self.default_mode = default_mode
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def select_mode(self, algorithm_type: str, input_data: Dict[str, Any]) -> str:
+        return self._mode_for(algorithm_type, estimate_algorithm_work(algorithm_type, input_data))
+
+    def _mode_for(self, algorithm_type: str, work: int) -> str:
+        if not self.enabled:
+            return INLINE
+        mode = self.routes.get(algorithm_type, self.default_mode)
+        if mode != INLINE and work <= self.inline_threshold:
+            # Not worth the pickling/IPC round trip
+            return INLINE
+        return mode
+
+    async def run(self, kernel: AlgorithmKernel, algorithm_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        work = estimate_algorithm_work(algorithm_type, input_data)
+        mode = self._mode_for(algorithm_type, work)
+        in_flight = ALGORITHMS_IN_FLIGHT.labels(algorithm_type)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await self._dispatch(mode, kernel, algorithm_type, input_data)
+        finally:
+            in_flight.dec()
+            ALGORITHM_COMPUTE_SECONDS.labels(algorithm_type, size_bucket(work), mode).observe(time.perf_counter() - start)
+
+    async def _dispatch(self, mode: str, kernel: AlgorithmKernel, algorithm_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        if mode == INLINE:
+            return kernel(algorithm_type, input_data)
+        if mode == THREAD:
+            return await asyncio.to_thread(kernel, algorithm_type, input_data)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_pool(), kernel, algorithm_type, input_data)
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault); drop the pool so the next call gets a fresh one
+            self.shutdown(wait=False)
+            raise
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop is unsafe, and
+            # max_tasks_per_child is not supported with fork
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._pool
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[AlgorithmExecutor] = None
+
+
+def get_algorithm_executor() -> AlgorithmExecutor:
+    global _executor
+    if _executor is None:
+        _executor = AlgorithmExecutor(
+            enabled=settings.ALGORITHM_POOL_ENABLED,
+            max_workers=settings.ALGORITHM_POOL_SIZE or None,
+            max_tasks_per_child=settings.ALGORITHM_POOL_MAX_TASKS_PER_CHILD or None,
+            routes=parse_routes(settings.ALGORITHM_EXECUTOR_ROUTES),
+            inline_threshold=settings.ALGORITHM_INLINE_WORK_THRESHOLD,
+        )
+    return _executor
+
+
+def shutdown_algorithm_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -1,123 +1,778 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
-from supabase import Client
+from functools import lru_cache
+import asyncio
+import math
+import random
+import sys
+import time
+from pydantic import ValidationError
+from supabase import AsyncClient
 
-from app.services.supabase_service import SupabaseService
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see the "numpy" extra
+    np = None
+
+from app.core.metrics import ALGORITHM_COALESCED, RESULT_CACHE_LOOKUPS
+from app.core.timing import timing_phase
+from app.models.algorithm import AlgorithmRequest, AlgorithmStatus
+from app.schemas.algorithm import (
+    FactorizeInput,
+    FibonacciInput,
+    FIBONACCI_AUTO_SEQUENCE_MAX_N,
+    MatrixMultiplyInput,
+    PrimeCheckInput,
+    SortingInput
+)
+from app.services.supabase_service import AsyncSupabaseService, keyset_filter
+from app.services.algorithm_executor import AlgorithmExecutor, get_algorithm_executor
+from app.services.audit_logger import AuditLogger, get_audit_logger
+from app.services.job_queue import JobQueue, JobQueueFullError
+from app.services.result_cache import ResultCache, get_result_cache
+from app.services.single_flight import SingleFlight, get_single_flight
+from app.utils.helpers import (
+    calculate_processing_time,
+    canonical_input_key,
+    generate_uuid,
+    int_to_decimal_string,
+    json_size,
+    matrix_to_array,
+    validate_matrix
+)
+
+PISANO_SEARCH_LIMIT = 100_000
+
+# The first 13 primes as Miller-Rabin bases decide primality exactly for every
+# n below this bound (which covers all 64-bit integers)
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MILLER_RABIN_DETERMINISTIC_LIMIT = 3317044064679887385961981
+MILLER_RABIN_DEFAULT_ROUNDS = 40
+
+# Ranges at or below this size are finished by insertion sort
+INSERTION_SORT_THRESHOLD = 16
+NINTHER_THRESHOLD = 128
+
+FLOAT64_EXACT_INT_BOUND = 2**53
+INT64_BOUND = 2**63
+
+HISTORY_COLUMNS = "id,user_id,algorithm_type,input_data,result,status,error,created_at,completed_at,compute_ms"
+HISTORY_CURSOR_COLUMNS = ("created_at", "id")
+HISTORY_ORDER = (("created_at", True), ("id", True))
+
+# Result keys that only repeat part of input_data: result key -> input key
+INPUT_ECHO_FIELDS: Dict[str, Dict[str, str]] = {
+    "sorting": {"original": "array"},
+    "matrix_multiply": {"matrix_a": "matrix_a", "matrix_b": "matrix_b"},
+}
+
+
+def _sieve(limit: int) -> List[int]:
+    is_prime = bytearray([1]) * (limit + 1)
+    is_prime[0:2] = b"\x00\x00"
+    for i in range(2, math.isqrt(limit) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytearray(len(range(i * i, limit + 1, i)))
+    return [i for i, flag in enumerate(is_prime) if flag]
+
+
+SMALL_PRIMES = _sieve(10_000)
+
+
+def compute_algorithm(algorithm_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Module-level entry point so worker processes can unpickle it by reference
+    if algorithm_type == "fibonacci":
+        result = AlgorithmService._fibonacci_algorithm(input_data)
+    elif algorithm_type == "prime_check":
+        result = AlgorithmService._prime_check_algorithm(input_data)
+    elif algorithm_type == "factorize":
+        result = AlgorithmService._factorize_algorithm(input_data)
+    elif algorithm_type == "sorting":
+        result = AlgorithmService._sorting_algorithm(input_data)
+    elif algorithm_type == "matrix_multiply":
+        result = AlgorithmService._matrix_multiply_algorithm(input_data)
+    else:
+        raise ValueError(f"Unknown algorithm type: {algorithm_type}")
+    
+    # Input echoes never cross the process boundary or sit in the result
+    # cache; project_result restores them from input_data when requested
+    for field in INPUT_ECHO_FIELDS.get(algorithm_type, {}):
+        result.pop(field, None)
+    return result
+
+
+def compute_algorithm_sized(algorithm_type: str, input_data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    # Sizes the result for the result cache where the kernel ran, so a large
+    # result is never serialized an extra time on the event loop
+    result = compute_algorithm(algorithm_type, input_data)
+    return result, json_size(result)
+
+
+def project_result(
+    algorithm_type: str,
+    input_data: Dict[str, Any],
+    result: Dict[str, Any],
+    include_inputs: bool = True,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    # Builds a new dict: result may be a shared cache entry
+    echoes = INPUT_ECHO_FIELDS.get(algorithm_type, {}) if include_inputs else {}
+    projected = {field: input_data.get(key, []) for field, key in echoes.items()}
+    projected.update(result)
+    if fields is not None:
+        projected = {key: value for key, value in projected.items() if key in fields}
+    return projected
 
 
 class AlgorithmService:
-    def __init__(self, supabase_client: Client):
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        executor: Optional[AlgorithmExecutor] = None,
+        result_cache: Optional[ResultCache] = None,
+        audit_logger: Optional[AuditLogger] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
         self.supabase = supabase_client
-        self.db_service = SupabaseService(supabase_client)
+        self.db_service = AsyncSupabaseService(supabase_client)
+        self.executor = executor or get_algorithm_executor()
+        self.result_cache = result_cache if result_cache is not None else get_result_cache()
+        self.single_flight = single_flight if single_flight is not None else get_single_flight()
+        # None means audit rows are written synchronously around the computation
+        self.audit_logger = audit_logger or get_audit_logger()
     
-    def process_algorithm(self, algorithm_type: str, input_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def process_algorithm(
+        self,
+        algorithm_type: str,
+        input_data: Dict[str, Any],
+        user_id: str,
+        include_inputs: bool = True,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        algorithm_type = getattr(algorithm_type, "value", algorithm_type)
+        if self.audit_logger is not None:
+            return await self._process_write_behind(algorithm_type, input_data, user_id, include_inputs, fields)
+        
         try:
             # Log the algorithm request
-            request_data = {
-                "user_id": user_id,
-                "algorithm_type": algorithm_type,
-                "input_data": input_data,
-                "status": "processing",
-                "created_at": datetime.utcnow().isoformat(),
-            }
-            
-            request_record = self.db_service.create_record("algorithm_requests", request_data)
+            with timing_phase("db_insert"):
+                request_record = await self.db_service.create_record(
+                    "algorithm_requests",
+                    self._build_request_data(user_id, algorithm_type, input_data, AlgorithmStatus.PROCESSING)
+                )
+        except Exception as e:
+            raise Exception(f"Algorithm processing failed: {str(e)}")
+        
+        return await self._execute_request(request_record["id"], algorithm_type, input_data, include_inputs, fields)
+    
+    async def _process_write_behind(
+        self,
+        algorithm_type: str,
+        input_data: Dict[str, Any],
+        user_id: str,
+        include_inputs: bool,
+        fields: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        # No database round trip on the request path: the id is generated
+        # here and the finished row is handed to the audit logger
+        request_id = generate_uuid()
+        row = {
+            "id": request_id,
+            **self._build_request_data(user_id, algorithm_type, input_data, AlgorithmStatus.PROCESSING),
+            "result": None,
+            "error": None
+        }
+        try:
+            with timing_phase("compute"):
+                result, cache_hit, compute_seconds = await self._timed_compute(algorithm_type, input_data)
+            result = project_result(algorithm_type, input_data, result, include_inputs, fields)
+        except Exception as e:
+            await self.audit_logger.log({
+                **row,
+                "status": AlgorithmStatus.FAILED.value,
+                "error": str(e),
+                "completed_at": datetime.utcnow().isoformat()
+            })
+            if isinstance(e, ValidationError):
+                raise
+            raise Exception(f"Algorithm processing failed: {str(e)}")
+        
+        await self.audit_logger.log({
+            **row,
+            "status": AlgorithmStatus.COMPLETED.value,
+            "result": result,
+            "completed_at": datetime.utcnow().isoformat(),
+            "compute_ms": self._to_ms(compute_seconds)
+        })
+        return {
+            "request_id": request_id,
+            "algorithm_type": algorithm_type,
+            "result": result,
+            "processing_time": calculate_processing_time(0.0, compute_seconds),
+            "status": "completed",
+            "cache_hit": cache_hit
+        }
+    
+    async def submit_algorithm(
+        self,
+        algorithm_type: str,
+        input_data: Dict[str, Any],
+        user_id: str,
+        job_queue: JobQueue,
+        include_inputs: bool = True,
+        fields: Optional[List[str]] = None
+    ) -> AlgorithmRequest:
+        algorithm_type = getattr(algorithm_type, "value", algorithm_type)
+        if job_queue.is_full():
+            raise JobQueueFullError("Job queue is full, try again later")
+        
+        request_record = await self.db_service.create_record(
+            "algorithm_requests",
+            self._build_request_data(user_id, algorithm_type, input_data, AlgorithmStatus.PENDING)
+        )
+        job = AlgorithmRequest(
+            id=request_record["id"],
+            user_id=user_id,
+            algorithm_type=algorithm_type,
+            input_data=input_data
+        )
+        
+        async def run_job() -> Dict[str, Any]:
+            await self.db_service.update_record("algorithm_requests", job.id, {
+                "status": AlgorithmStatus.PROCESSING.value
+            })
+            return await self._execute_request(job.id, algorithm_type, input_data, include_inputs, fields)
+        
+        async def interrupt_job(error: str) -> None:
+            await self._mark_failed(job.id, Exception(error))
+        
+        try:
+            return job_queue.submit(job, run_job, interrupt_job)
+        except JobQueueFullError as e:
+            await self._mark_failed(job.id, e)
+            raise
+    
+    async def get_job(self, job_id: str, user_id: str, job_queue: JobQueue) -> Optional[Dict[str, Any]]:
+        # Jobs queued on this worker are answered from memory, anything else from the database
+        job = job_queue.get(job_id)
+        if job is not None:
+            return job.to_dict() if job.user_id == user_id else None
+        
+        record = await self.db_service.get_record("algorithm_requests", job_id)
+        if record and record.get("user_id") == user_id:
+            return record
+        return None
+    
+    async def _execute_request(
+        self,
+        request_id: str,
+        algorithm_type: str,
+        input_data: Dict[str, Any],
+        include_inputs: bool = True,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        try:
+            with timing_phase("compute"):
+                result, cache_hit, compute_seconds = await self._timed_compute(algorithm_type, input_data)
             
-            # Process based on algorithm type
-            if algorithm_type == "fibonacci":
-                result = self._fibonacci_algorithm(input_data)
-            elif algorithm_type == "prime_check":
-                result = self._prime_check_algorithm(input_data)
-            elif algorithm_type == "sorting":
-                result = self._sorting_algorithm(input_data)
-            elif algorithm_type == "matrix_multiply":
-                result = self._matrix_multiply_algorithm(input_data)
-            else:
-                raise ValueError(f"Unknown algorithm type: {algorithm_type}")
+            # The same projection is stored and returned
+            result = project_result(algorithm_type, input_data, result, include_inputs, fields)
             
             # Update the request with results
-            self.db_service.update_record("algorithm_requests", request_record["id"], {
-                "result": result,
-                "status": "completed",
-                "completed_at": datetime.utcnow().isoformat()
-            })
+            with timing_phase("db_update"):
+                await self.db_service.update_record("algorithm_requests", request_id, {
+                    "result": result,
+                    "status": AlgorithmStatus.COMPLETED.value,
+                    "completed_at": datetime.utcnow().isoformat(),
+                    "compute_ms": self._to_ms(compute_seconds)
+                })
             
             return {
-                "request_id": request_record["id"],
+                "request_id": request_id,
                 "algorithm_type": algorithm_type,
                 "result": result,
-                "processing_time": "calculated",
-                "status": "completed"
+                "processing_time": calculate_processing_time(0.0, compute_seconds),
+                "status": "completed",
+                "cache_hit": cache_hit
             }
             
         except Exception as e:
             # Update request with error
-            if 'request_record' in locals():
-                self.db_service.update_record("algorithm_requests", request_record["id"], {
-                    "status": "failed",
-                    "error": str(e),
-                    "completed_at": datetime.utcnow().isoformat()
-                })
+            await self._mark_failed(request_id, e)
+            if isinstance(e, ValidationError):
+                # Input the kernel's schema rejects: the route answers 422
+                raise
             raise Exception(f"Algorithm processing failed: {str(e)}")
     
-    def get_algorithm_history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.db_service.get_records(
+    async def process_batch(self, items: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+        # One bulk insert, concurrent computation, one bulk upsert; a failing
+        # item is reported in its own entry instead of failing the batch
+        rows = [
+            self._build_request_data(
+                user_id,
+                getattr(item["algorithm_type"], "value", item["algorithm_type"]),
+                item["input_data"],
+                AlgorithmStatus.PROCESSING
+            )
+            for item in items
+        ]
+        try:
+            with timing_phase("db_insert"):
+                records = await self.db_service.create_records("algorithm_requests", rows)
+        except Exception as e:
+            raise Exception(f"Batch processing failed: {str(e)}")
+        if len(records) != len(rows):
+            raise Exception("Batch processing failed: insert returned an unexpected number of rows")
+        
+        # Items run concurrently, so the phase is the wall time of the whole gather
+        with timing_phase("compute"):
+            outcomes = await asyncio.gather(
+                *(self._timed_compute(row["algorithm_type"], row["input_data"]) for row in rows),
+                return_exceptions=True
+            )
+        
+        completed_at = datetime.utcnow().isoformat()
+        updates, results = [], []
+        for index, (item, row, record, outcome) in enumerate(zip(items, rows, records, outcomes)):
+            if isinstance(outcome, Exception):
+                status, result, error, compute_ms = AlgorithmStatus.FAILED, None, str(outcome), None
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                status, error, compute_ms = AlgorithmStatus.COMPLETED, None, self._to_ms(outcome[2])
+                result = project_result(
+                    row["algorithm_type"],
+                    row["input_data"],
+                    outcome[0],
+                    item.get("include_inputs", True),
+                    item.get("fields")
+                )
+            
+            # Full rows: an upsert inserts before it resolves the conflict, so
+            # the NOT NULL columns have to be present
+            updates.append({
+                **row,
+                "id": record["id"],
+                "created_at": record.get("created_at", row["created_at"]),
+                "status": status.value,
+                "result": result,
+                "error": error,
+                "completed_at": completed_at,
+                "compute_ms": compute_ms
+            })
+            results.append({
+                "index": index,
+                "request_id": record["id"],
+                "algorithm_type": row["algorithm_type"],
+                "status": status.value,
+                "result": result,
+                "error": error
+            })
+        
+        try:
+            with timing_phase("db_update"):
+                await self.db_service.upsert_records("algorithm_requests", updates)
+        except Exception as e:
+            raise Exception(f"Batch processing failed: {str(e)}")
+        return results
+    
+    async def _compute(self, algorithm_type: str, input_data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        # All kernels are pure functions of input_data, so identical inputs share a result
+        cache_key = canonical_input_key(algorithm_type, input_data)
+        result = self.result_cache.get(cache_key)
+        if result is not None:
+            RESULT_CACHE_LOOKUPS.labels("hit").inc()
+            return result, True
+        RESULT_CACHE_LOOKUPS.labels("miss").inc()
+        
+        # Callers that arrive while the same input is computing share that
+        # run; a joined result counts as a hit since this caller paid nothing
+        result, shared = await self.single_flight.run(
+            cache_key,
+            lambda: self._compute_and_cache(cache_key, algorithm_type, input_data)
+        )
+        if shared:
+            ALGORITHM_COALESCED.labels(algorithm_type).inc()
+        return result, shared
+    
+    async def _compute_and_cache(self, cache_key: str, algorithm_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Run the kernel off the event loop (or inline for tiny inputs)
+        result, size = await self.executor.run(compute_algorithm_sized, algorithm_type, input_data)
+        self.result_cache.set(cache_key, result, size)
+        return result
+    
+    async def _timed_compute(self, algorithm_type: str, input_data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool, float]:
+        # perf_counter is monotonic, so wall clock adjustments cannot skew the duration
+        start = time.perf_counter()
+        result, cache_hit = await self._compute(algorithm_type, input_data)
+        return result, cache_hit, time.perf_counter() - start
+    
+    @staticmethod
+    def _to_ms(seconds: float) -> float:
+        return round(seconds * 1000, 3)
+    
+    async def _mark_failed(self, request_id: str, error: Exception) -> None:
+        await self.db_service.update_record("algorithm_requests", request_id, {
+            "status": AlgorithmStatus.FAILED.value,
+            "error": str(error),
+            "completed_at": datetime.utcnow().isoformat()
+        })
+    
+    @staticmethod
+    def _build_request_data(user_id: str, algorithm_type: str, input_data: Dict[str, Any], status: AlgorithmStatus) -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "algorithm_type": algorithm_type,
+            "input_data": input_data,
+            "status": status.value,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+    
+    def iter_algorithm_history(
+        self,
+        user_id: str,
+        algorithm_type: Optional[str] = None,
+        chunk_size: int = 500
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        filters = {"user_id": user_id}
+        if algorithm_type:
+            filters["algorithm_type"] = getattr(algorithm_type, "value", algorithm_type)
+        return self.db_service.iter_records(
             "algorithm_requests",
-            filters={"user_id": user_id},
-            limit=limit
+            filters=filters,
+            columns=HISTORY_COLUMNS,
+            key_columns=HISTORY_CURSOR_COLUMNS,
+            chunk_size=chunk_size
         )
     
-    def _fibonacci_algorithm(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        n = input_data.get("n", 10)
-        if n < 0:
-            raise ValueError("n must be non-negative")
+    async def get_history_version(self, user_id: str) -> List[Optional[str]]:
+        # Changes whenever a row is added, deleted or updated in any way (an
+        # async job going pending -> processing included), which is when
+        # /history and /stats change; two single-row index lookups
+        latest_created, latest_updated = await asyncio.gather(
+            self.db_service.get_records(
+                "algorithm_requests",
+                filters={"user_id": user_id},
+                limit=1,
+                columns="id,created_at",
+                order_by=HISTORY_ORDER
+            ),
+            self.db_service.get_records(
+                "algorithm_requests",
+                filters={"user_id": user_id},
+                limit=1,
+                columns="id,updated_at",
+                order_by=(("updated_at", True),)
+            )
+        )
+        version = []
+        for rows, column in ((latest_created, "created_at"), (latest_updated, "updated_at")):
+            version += [rows[0]["id"], rows[0][column]] if rows else [None, None]
+        return version
+    
+    async def get_algorithm_stats(self, user_id: str) -> Dict[str, Any]:
+        # One row per (algorithm_type, status) from the counters kept by the
+        # algorithm_request_stats trigger, independent of history size
+        rows = await self.db_service.execute_rpc("get_algorithm_stats", {"p_user_id": user_id}) or []
         
-        if n <= 1:
-            return {"result": n, "sequence": [0] if n == 0 else [0, 1]}
+        stats = {
+            "total_requests": 0,
+            "completed_requests": 0,
+            "failed_requests": 0,
+            "algorithm_usage": {}
+        }
+        for row in rows:
+            count = int(row["count"])
+            if not count:
+                continue
+            stats["total_requests"] += count
+            if row["status"] == AlgorithmStatus.COMPLETED.value:
+                stats["completed_requests"] += count
+            elif row["status"] == AlgorithmStatus.FAILED.value:
+                stats["failed_requests"] += count
+            usage = stats["algorithm_usage"]
+            usage[row["algorithm_type"]] = usage.get(row["algorithm_type"], 0) + count
+        return stats
+    
+    async def get_algorithm_history(
+        self,
+        user_id: str,
+        limit: int = 50,
+        algorithm_type: Optional[str] = None,
+        after: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        # Newest first, keyset-paginated on (created_at, id) so every page is
+        # an index range scan instead of an OFFSET
+        filters = {"user_id": user_id}
+        if algorithm_type:
+            filters["algorithm_type"] = getattr(algorithm_type, "value", algorithm_type)
+        return await self.db_service.get_records(
+            "algorithm_requests",
+            filters=filters,
+            limit=limit,
+            columns=HISTORY_COLUMNS,
+            order_by=HISTORY_ORDER,
+            or_filter=keyset_filter(HISTORY_CURSOR_COLUMNS, after) if after else None
+        )
+    
+    @staticmethod
+    def _fibonacci_algorithm(input_data: Dict[str, Any]) -> Dict[str, Any]:
+        params = FibonacciInput(**input_data)
+        n, modulus = params.n, params.modulus
+        
+        output: Dict[str, Any] = {
+            "result": AlgorithmService._encode_int(AlgorithmService._fibonacci_at(n, modulus))
+        }
+        if modulus is not None:
+            output["modulus"] = modulus
         
-        sequence = [0, 1]
-        for i in range(2, n + 1):
-            sequence.append(sequence[i-1] + sequence[i-2])
+        include_sequence = params.include_sequence
+        if include_sequence is None:
+            include_sequence = params.count is None and n <= FIBONACCI_AUTO_SEQUENCE_MAX_N
         
-        return {"result": sequence[n], "sequence": sequence}
+        if params.count is not None:
+            start = params.start or 0
+            output["start"] = start
+            output["sequence"] = AlgorithmService._fibonacci_slice(start, params.count, modulus)
+        elif include_sequence:
+            output["sequence"] = AlgorithmService._fibonacci_slice(0, n + 1, modulus)
+        
+        return output
+    
+    @staticmethod
+    def _fibonacci_at(n: int, modulus: Optional[int] = None) -> int:
+        if modulus is not None:
+            period = AlgorithmService._pisano_period(modulus)
+            if period:
+                n %= period
+        return AlgorithmService._fibonacci_pair(n, modulus)[0]
+    
+    @staticmethod
+    def _fibonacci_slice(start: int, count: int, modulus: Optional[int] = None) -> List[Any]:
+        if modulus is not None:
+            period = AlgorithmService._pisano_period(modulus)
+            if period:
+                start %= period
+        # Fast-double to the first index, then walk forward
+        a, b = AlgorithmService._fibonacci_pair(start, modulus)
+        sequence = []
+        for _ in range(count):
+            sequence.append(a)
+            a, b = b, (a + b) % modulus if modulus is not None else a + b
+        return sequence
+    
+    @staticmethod
+    def _fibonacci_pair(n: int, modulus: Optional[int] = None) -> Tuple[int, int]:
+        # Fast doubling: (F(k), F(k+1)) -> (F(2k), F(2k+1)) in O(log n) steps
+        #   F(2k)   = F(k) * (2 * F(k+1) - F(k))
+        #   F(2k+1) = F(k)^2 + F(k+1)^2
+        a, b = 0, 1
+        for bit in bin(n)[2:]:
+            c = a * (2 * b - a)
+            d = a * a + b * b
+            if modulus is not None:
+                c %= modulus
+                d %= modulus
+            if bit == "1":
+                a, b = d, c + d
+                if modulus is not None:
+                    b %= modulus
+            else:
+                a, b = c, d
+        return a, b
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _pisano_period(modulus: int) -> Optional[int]:
+        # F(n) mod m repeats with period pi(m); closed forms cover the common
+        # powers of two and ten, small moduli are searched directly
+        if modulus == 1:
+            return 1
+        if modulus & (modulus - 1) == 0:
+            return 3 * modulus // 2
+        power, rest = 0, modulus
+        while rest % 10 == 0:
+            rest //= 10
+            power += 1
+        if rest == 1:
+            return 60 if power == 1 else 300 if power == 2 else 15 * 10 ** (power - 1)
+        if modulus <= PISANO_SEARCH_LIMIT:
+            a, b = 0, 1
+            for i in range(1, 6 * modulus + 1):
+                a, b = b, (a + b) % modulus
+                if a == 0 and b == 1:
+                    return i
+        return None
+    
+    @staticmethod
+    def _encode_int(value: int) -> Any:
+        # Values past the int->str digit limit are returned as decimal strings
+        if value.bit_length() <= sys.get_int_max_str_digits() * 3:
+            return value
+        return int_to_decimal_string(value)
+    
+    @staticmethod
+    def _prime_check_algorithm(input_data: Dict[str, Any]) -> Dict[str, Any]:
+        params = PrimeCheckInput(**input_data)
+        number = params.number
+        
+        # Cheap pre-filter: settles small inputs and most composites
+        for prime in SMALL_PRIMES:
+            if prime * prime > number:
+                return {"is_prime": True, "number": number, "method": "trial_division"}
+            if number % prime == 0:
+                if number == prime:
+                    return {"is_prime": True, "number": number, "method": "trial_division"}
+                return {"is_prime": False, "number": number, "divisor": prime, "method": "trial_division"}
+        
+        deterministic = number < MILLER_RABIN_DETERMINISTIC_LIMIT
+        return {
+            "is_prime": AlgorithmService._miller_rabin(number, params.rounds),
+            "number": number,
+            "method": "miller_rabin" if deterministic else "miller_rabin_probabilistic"
+        }
     
-    def _prime_check_algorithm(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        number = input_data.get("number")
-        if number is None:
-            raise ValueError("number is required")
+    @staticmethod
+    def _factorize_algorithm(input_data: Dict[str, Any]) -> Dict[str, Any]:
+        params = FactorizeInput(**input_data)
+        remaining = params.number
+        factors: List[int] = []
         
-        if number < 2:
-            return {"is_prime": False, "number": number}
+        for prime in SMALL_PRIMES:
+            if prime * prime > remaining:
+                break
+            while remaining % prime == 0:
+                factors.append(prime)
+                remaining //= prime
         
-        for i in range(2, int(number ** 0.5) + 1):
-            if number % i == 0:
-                return {"is_prime": False, "number": number, "divisor": i}
+        # Whatever survives trial division has only large prime factors
+        pending = [remaining] if remaining > 1 else []
+        while pending:
+            value = pending.pop()
+            if AlgorithmService._miller_rabin(value):
+                factors.append(value)
+                continue
+            divisor = AlgorithmService._pollard_rho(value)
+            pending.extend((divisor, value // divisor))
         
-        return {"is_prime": True, "number": number}
+        factors.sort()
+        prime_factors: Dict[str, int] = {}
+        for factor in factors:
+            prime_factors[str(factor)] = prime_factors.get(str(factor), 0) + 1
+        
+        return {
+            "number": params.number,
+            "factors": factors,
+            "prime_factors": prime_factors,
+            "is_prime": len(factors) == 1
+        }
     
-    def _sorting_algorithm(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        array = input_data.get("array", [])
-        algorithm = input_data.get("algorithm", "quicksort")
+    @staticmethod
+    def _miller_rabin(n: int, rounds: int = MILLER_RABIN_DEFAULT_ROUNDS) -> bool:
+        if n < 2:
+            return False
+        for prime in MILLER_RABIN_BASES:
+            if n % prime == 0:
+                return n == prime
+        
+        d, s = n - 1, 0
+        while d % 2 == 0:
+            d //= 2
+            s += 1
+        
+        if n < MILLER_RABIN_DETERMINISTIC_LIMIT:
+            # These bases are a proof of primality below the limit
+            bases = MILLER_RABIN_BASES
+        else:
+            # Seeded by n so the same input always gets the same answer
+            rng = random.Random(n)
+            bases = tuple(rng.randrange(2, n - 1) for _ in range(rounds))
+        
+        for base in bases:
+            x = pow(base, d, n)
+            if x == 1 or x == n - 1:
+                continue
+            for _ in range(s - 1):
+                x = x * x % n
+                if x == n - 1:
+                    break
+            else:
+                return False
+        return True
+    
+    @staticmethod
+    def _pollard_rho(n: int) -> int:
+        # Brent's variant with batched gcds; n must be an odd composite
+        rng = random.Random(n)
+        while True:
+            y, c, batch = rng.randrange(1, n), rng.randrange(1, n), 128
+            g = r = q = 1
+            while g == 1:
+                x = y
+                for _ in range(r):
+                    y = (y * y + c) % n
+                k = 0
+                while k < r and g == 1:
+                    ys = y
+                    for _ in range(min(batch, r - k)):
+                        y = (y * y + c) % n
+                        q = q * abs(x - y) % n
+                    g = math.gcd(q, n)
+                    k += batch
+                r *= 2
+            if g == n:
+                # The batch overshot; replay it one step at a time
+                g = 1
+                while g == 1:
+                    ys = (ys * ys + c) % n
+                    g = math.gcd(abs(x - ys), n)
+            if g != n:
+                return g
+    
+    @classmethod
+    def _sorting_algorithm(cls, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        params = SortingInput(**input_data)
+        # Validation already copied the array, so the engines can sort it in place
+        array, algorithm = params.array, params.algorithm
         
         if algorithm == "quicksort":
-            sorted_array = self._quicksort(array.copy())
+            sorted_array = cls._quicksort(array)
         elif algorithm == "mergesort":
-            sorted_array = self._mergesort(array.copy())
+            sorted_array = cls._mergesort(array)
         else:
             sorted_array = sorted(array)
         
         return {
-            "original": array,
+            "original": input_data["array"],
             "sorted": sorted_array,
             "algorithm": algorithm
         }
     
-    def _matrix_multiply_algorithm(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        matrix_a = input_data.get("matrix_a", [])
-        matrix_b = input_data.get("matrix_b", [])
+    @staticmethod
+    def _matrix_multiply_algorithm(input_data: Dict[str, Any]) -> Dict[str, Any]:
+        params = MatrixMultiplyInput(**input_data)
+        matrix_a, matrix_b, backend = params.matrix_a, params.matrix_b, params.backend
+        
+        if backend == "numpy" and np is None:
+            raise ValueError("The numpy backend is not installed")
         
-        if not matrix_a or not matrix_b:
-            raise ValueError("Both matrices are required")
+        if backend == "python" or np is None:
+            result, (rows_a, cols_a), (rows_b, cols_b) = AlgorithmService._matrix_multiply_python(matrix_a, matrix_b)
+        else:
+            result, (rows_a, cols_a), (rows_b, cols_b) = AlgorithmService._matrix_multiply_numpy(matrix_a, matrix_b)
+        
+        return {
+            "matrix_a": matrix_a,
+            "matrix_b": matrix_b,
+            "result": result,
+            "dimensions": f"{rows_a}x{cols_a} × {rows_b}x{cols_b} = {rows_a}x{cols_b}"
+        }
+    
+    @staticmethod
+    def _matrix_multiply_python(matrix_a: List[List[int]], matrix_b: List[List[int]]) -> Tuple[List[List[int]], Tuple[int, int], Tuple[int, int]]:
+        # Reference implementation: exact for any Python ints, O(n^3) interpreted
+        if not validate_matrix(matrix_a) or not validate_matrix(matrix_b):
+            raise ValueError("Matrices must be non-empty and rectangular")
         
         rows_a, cols_a = len(matrix_a), len(matrix_a[0])
         rows_b, cols_b = len(matrix_b), len(matrix_b[0])
@@ -132,47 +787,185 @@ class AlgorithmService:
                 for k in range(cols_a):
                     result[i][j] += matrix_a[i][k] * matrix_b[k][j]
         
-        return {
-            "matrix_a": matrix_a,
-            "matrix_b": matrix_b,
-            "result": result,
-            "dimensions": f"{rows_a}x{cols_a} × {rows_b}x{cols_b} = {rows_a}x{cols_b}"
-        }
+        return result, (rows_a, cols_a), (rows_b, cols_b)
     
-    def _quicksort(self, arr: List[int]) -> List[int]:
-        if len(arr) <= 1:
-            return arr
+    @staticmethod
+    def _matrix_multiply_numpy(matrix_a: List[List[int]], matrix_b: List[List[int]]) -> Tuple[List[List[Any]], Tuple[int, int], Tuple[int, int]]:
+        array_a = matrix_to_array(matrix_a)
+        array_b = matrix_to_array(matrix_b)
+        if array_a is None or array_b is None:
+            raise ValueError("Matrices must be non-empty and rectangular")
         
-        pivot = arr[len(arr) // 2]
-        left = [x for x in arr if x < pivot]
-        middle = [x for x in arr if x == pivot]
-        right = [x for x in arr if x > pivot]
+        (rows_a, cols_a), (rows_b, cols_b) = array_a.shape, array_b.shape
+        if cols_a != rows_b:
+            raise ValueError("Matrix dimensions are incompatible for multiplication")
         
-        return self._quicksort(left) + middle + self._quicksort(right)
+        if array_a.dtype.kind in "iub" and array_b.dtype.kind in "iub":
+            # Largest possible magnitude of any partial sum in the product
+            bound = (
+                max(abs(int(array_a.max())), abs(int(array_a.min())))
+                * max(abs(int(array_b.max())), abs(int(array_b.min())))
+                * cols_a
+            )
+            if bound < FLOAT64_EXACT_INT_BOUND:
+                # Every product and partial sum is an integer float64 holds
+                # exactly, whatever order BLAS adds them in
+                product = np.ascontiguousarray(array_a, dtype=np.float64) @ np.ascontiguousarray(array_b, dtype=np.float64)
+                result = np.rint(product).astype(np.int64)
+            elif bound < INT64_BOUND:
+                result = np.ascontiguousarray(array_a, dtype=np.int64) @ np.ascontiguousarray(array_b, dtype=np.int64)
+            else:
+                result = array_a.astype(object) @ array_b.astype(object)
+        elif array_a.dtype.kind in "iubf" and array_b.dtype.kind in "iubf":
+            result = np.ascontiguousarray(array_a, dtype=np.float64) @ np.ascontiguousarray(array_b, dtype=np.float64)
+        else:
+            # Object arrays hold ints beyond int64; multiply them exactly
+            result = array_a.astype(object) @ array_b.astype(object)
+        
+        return result.tolist(), (rows_a, cols_a), (rows_b, cols_b)
     
-    def _mergesort(self, arr: List[int]) -> List[int]:
-        if len(arr) <= 1:
+    @staticmethod
+    def _quicksort(arr: List[int]) -> List[int]:
+        # In-place introsort: iterative Hoare quicksort with median-of-three
+        # (ninther on large ranges) pivots, heapsort once a range recurses too deep, and one final
+        # insertion sort pass over the nearly sorted array
+        n = len(arr)
+        if n < 2:
             return arr
         
-        mid = len(arr) // 2
-        left = self._mergesort(arr[:mid])
-        right = self._mergesort(arr[mid:])
+        stack = [(0, n - 1, 2 * n.bit_length())]
+        while stack:
+            lo, hi, depth = stack.pop()
+            while hi - lo > INSERTION_SORT_THRESHOLD:
+                if depth == 0:
+                    AlgorithmService._heapsort(arr, lo, hi)
+                    break
+                depth -= 1
+                
+                # Pivot goes to arr[lo], which keeps both Hoare partitions non-empty
+                p = AlgorithmService._choose_pivot(arr, lo, hi)
+                arr[lo], arr[p] = arr[p], arr[lo]
+                pivot = arr[lo]
+                
+                i, j = lo - 1, hi + 1
+                while True:
+                    i += 1
+                    while arr[i] < pivot:
+                        i += 1
+                    j -= 1
+                    while arr[j] > pivot:
+                        j -= 1
+                    if i >= j:
+                        break
+                    arr[i], arr[j] = arr[j], arr[i]
+                
+                # Defer the larger half so the stack stays O(log n)
+                if j - lo < hi - j:
+                    stack.append((j + 1, hi, depth))
+                    hi = j
+                else:
+                    stack.append((lo, j, depth))
+                    lo = j + 1
+        
+        AlgorithmService._insertion_sort(arr, 0, n - 1)
+        return arr
+    
+    @staticmethod
+    def _choose_pivot(arr: List[int], lo: int, hi: int) -> int:
+        def median_of_three(a: int, b: int, c: int) -> int:
+            if arr[a] < arr[b]:
+                if arr[b] < arr[c]:
+                    return b
+                return c if arr[a] < arr[c] else a
+            if arr[a] < arr[c]:
+                return a
+            return c if arr[b] < arr[c] else b
         
-        return self._merge(left, right)
+        mid = (lo + hi) // 2
+        if hi - lo < NINTHER_THRESHOLD:
+            return median_of_three(lo, mid, hi)
+        step = (hi - lo) // 8
+        return median_of_three(
+            median_of_three(lo, lo + step, lo + 2 * step),
+            median_of_three(mid - step, mid, mid + step),
+            median_of_three(hi - 2 * step, hi - step, hi)
+        )
     
-    def _merge(self, left: List[int], right: List[int]) -> List[int]:
-        result = []
-        i = j = 0
+    @staticmethod
+    def _mergesort(arr: List[int]) -> List[int]:
+        # Bottom-up mergesort: insertion-sorted runs, then passes that merge
+        # back and forth between arr and a single scratch buffer
+        n = len(arr)
+        if n < 2:
+            return arr
+        
+        width = INSERTION_SORT_THRESHOLD
+        for lo in range(0, n, width):
+            AlgorithmService._insertion_sort(arr, lo, min(lo + width, n) - 1)
+        
+        src, dst = arr, [0] * n
+        while width < n:
+            for lo in range(0, n, 2 * width):
+                mid = min(lo + width, n)
+                hi = min(lo + 2 * width, n)
+                if mid >= hi or src[mid - 1] <= src[mid]:
+                    # Single run, or the two runs are already in order
+                    dst[lo:hi] = src[lo:hi]
+                else:
+                    AlgorithmService._merge(src, dst, lo, mid, hi)
+            src, dst = dst, src
+            width *= 2
         
-        while i < len(left) and j < len(right):
-            if left[i] <= right[j]:
-                result.append(left[i])
+        if src is not arr:
+            arr[:] = src
+        return arr
+    
+    @staticmethod
+    def _merge(src: List[int], dst: List[int], lo: int, mid: int, hi: int) -> None:
+        # Stable merge of src[lo:mid] and src[mid:hi] into dst[lo:hi]
+        i, j, k = lo, mid, lo
+        while i < mid and j < hi:
+            if src[i] <= src[j]:
+                dst[k] = src[i]
                 i += 1
             else:
-                result.append(right[j])
+                dst[k] = src[j]
                 j += 1
+            k += 1
+        if i < mid:
+            dst[k:hi] = src[i:mid]
+        else:
+            dst[k:hi] = src[j:hi]
+    
+    @staticmethod
+    def _insertion_sort(arr: List[int], lo: int, hi: int) -> None:
+        for i in range(lo + 1, hi + 1):
+            value = arr[i]
+            j = i - 1
+            while j >= lo and arr[j] > value:
+                arr[j + 1] = arr[j]
+                j -= 1
+            arr[j + 1] = value
+    
+    @staticmethod
+    def _heapsort(arr: List[int], lo: int, hi: int) -> None:
+        n = hi - lo + 1
         
-        result.extend(left[i:])
-        result.extend(right[j:])
+        def sift_down(root: int, end: int) -> None:
+            value = arr[lo + root]
+            child = 2 * root + 1
+            while child < end:
+                if child + 1 < end and arr[lo + child] < arr[lo + child + 1]:
+                    child += 1
+                if arr[lo + child] <= value:
+                    break
+                arr[lo + root] = arr[lo + child]
+                root = child
+                child = 2 * root + 1
+            arr[lo + root] = value
         
-        return result
\ No newline at end of file
+        for root in range(n // 2 - 1, -1, -1):
+            sift_down(root, n)
+        for end in range(n - 1, 0, -1):
+            arr[lo], arr[lo + end] = arr[lo + end], arr[lo]
+            sift_down(0, end)
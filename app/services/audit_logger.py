@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import get_async_supabase_client
+from app.core.metrics import AUDIT_LOG_ROWS
+from app.services.supabase_service import AsyncSupabaseService
+
+_STOP = object()
+
+
+class AuditLogger:
+    # Write-behind buffer for finished algorithm_requests rows: rows are
+    # queued in memory and inserted in bulk by one background task
+    def __init__(
+        self,
+        table: str = "algorithm_requests",
+        max_queue_size: int = 10000,
+        flush_size: int = 200,
+        flush_interval: float = 1.0,
+        enqueue_timeout: float = 0.05,
+        db_service: Optional[AsyncSupabaseService] = None,
+    ):
+        self.table = table
+        self.max_queue_size = max_queue_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._db_service = db_service
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+    async def log(self, row: Dict[str, Any]) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            pass
+        # Backpressure: wait briefly for the flusher to make room, then shed
+        try:
+            await asyncio.wait_for(self._queue.put(row), timeout=self.enqueue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            AUDIT_LOG_ROWS.labels("dropped").inc()
+            return False
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if self._task is None or self._task.done():
+            # Fresh context: the flusher outlives the request that started it
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            if row is _STOP:
+                break
+            batch = [row]
+            # Flush when the batch is full or the oldest row has waited flush_interval
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        self.flushes += 1
+        try:
+            if self._db_service is None:
+                self._db_service = AsyncSupabaseService(await get_async_supabase_client())
+            await self._db_service.create_records(self.table, batch)
+            self.written += len(batch)
+            AUDIT_LOG_ROWS.labels("written").inc(len(batch))
+        except Exception:
+            self.failed += len(batch)
+            AUDIT_LOG_ROWS.labels("failed").inc(len(batch))
+
+    async def shutdown(self) -> None:
+        # Flush everything still buffered before the process exits
+        if self._task is not None and not self._task.done():
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        if self._queue is not None:
+            leftover = []
+            while not self._queue.empty():
+                row = self._queue.get_nowait()
+                if row is not _STOP:
+                    leftover.append(row)
+            for start in range(0, len(leftover), self.flush_size):
+                await self._flush(leftover[start:start + self.flush_size])
+
+
+_audit_logger: Optional[AuditLogger] = None
+
+
+def get_audit_logger() -> Optional[AuditLogger]:
+    global _audit_logger
+    if not settings.AUDIT_WRITE_BEHIND_ENABLED:
+        return None
+    if _audit_logger is None:
+        _audit_logger = AuditLogger(
+            max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+            flush_size=settings.AUDIT_FLUSH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+            enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT,
+        )
+    return _audit_logger
+
+
+async def shutdown_audit_logger() -> None:
+    global _audit_logger
+    if _audit_logger is not None:
+        await _audit_logger.shutdown()
+        _audit_logger = None
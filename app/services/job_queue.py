@@ -0,0 +1,125 @@
+import asyncio
+import contextvars
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.algorithm import AlgorithmRequest, AlgorithmStatus
+
+JobWork = Callable[[], Awaitable[Dict[str, Any]]]
+# Persists a job's failure when shutdown interrupts it
+JobInterrupt = Callable[[str], Awaitable[None]]
+JobItem = Tuple[AlgorithmRequest, JobWork]
+
+SHUTDOWN_ERROR = "Interrupted by shutdown"
+
+FINISHED_STATUSES = (AlgorithmStatus.COMPLETED, AlgorithmStatus.FAILED)
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    # In-memory queue backend: jobs live only in this worker process, the
+    # algorithm_requests row remains the durable record
+    def __init__(self, workers: int = 4, max_size: int = 1000, retention: int = 10000, drain_timeout: float = 10.0):
+        self.workers = workers
+        self.max_size = max_size
+        self.retention = retention
+        self.drain_timeout = drain_timeout
+        self._queue: Optional[asyncio.Queue[JobItem]] = None
+        self._jobs: "OrderedDict[str, AlgorithmRequest]" = OrderedDict()
+        self._interrupts: Dict[str, JobInterrupt] = {}
+        self._tasks: List[asyncio.Task[None]] = []
+
+    def is_full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def submit(self, job: AlgorithmRequest, work: JobWork, on_interrupt: Optional[JobInterrupt] = None) -> AlgorithmRequest:
+        queue = self._ensure_workers()
+        try:
+            queue.put_nowait((job, work))
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Job queue is full, try again later")
+        self._jobs[job.id] = job
+        if on_interrupt is not None:
+            self._interrupts[job.id] = on_interrupt
+        self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[AlgorithmRequest]:
+        return self._jobs.get(job_id)
+
+    def _ensure_workers(self) -> "asyncio.Queue[JobItem]":
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        queue = self._queue
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            # Fresh context: workers outlive the request that started them
+            self._tasks.append(asyncio.create_task(self._worker(queue), context=contextvars.Context()))
+        return queue
+
+    def _evict_finished(self) -> None:
+        while len(self._jobs) > self.retention:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].status not in FINISHED_STATUSES:
+                break
+            self._jobs.popitem(last=False)
+
+    async def _worker(self, queue: "asyncio.Queue[JobItem]") -> None:
+        while True:
+            job, work = await queue.get()
+            job.mark_processing()
+            try:
+                result = await work()
+                job.mark_completed(result["result"])
+            except Exception as e:
+                job.mark_failed(str(e))
+            finally:
+                queue.task_done()
+            # Not reached when shutdown cancels the job, which keeps its interrupt
+            self._interrupts.pop(job.id, None)
+
+    async def shutdown(self) -> None:
+        # Give queued and running jobs drain_timeout to finish, then fail the
+        # rest so their rows don't stay pending/processing forever
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+        for job in self._jobs.values():
+            if job.status not in FINISHED_STATUSES:
+                job.mark_failed(SHUTDOWN_ERROR)
+        interrupts, self._interrupts = self._interrupts, {}
+        await asyncio.gather(*(interrupt(SHUTDOWN_ERROR) for interrupt in interrupts.values()), return_exceptions=True)
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            workers=settings.JOB_QUEUE_WORKERS,
+            max_size=settings.JOB_QUEUE_MAX_SIZE,
+            retention=settings.JOB_QUEUE_RETENTION,
+            drain_timeout=settings.JOB_QUEUE_DRAIN_TIMEOUT,
+        )
+    return _job_queue
+
+
+async def shutdown_job_queue() -> None:
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.shutdown()
+        _job_queue = None
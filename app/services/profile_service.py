@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+from supabase import AsyncClient
+
+from app.core.metrics import track_supabase_call
+from app.services.result_cache import ResultCache, get_profile_cache
+
+PROFILE_COLUMNS = "id,first_name,last_name,avatar_url,preferences"
+PROFILE_FIELDS = ("first_name", "last_name", "avatar_url", "preferences")
+
+
+class ProfileService:
+    def __init__(self, supabase_client: AsyncClient, cache: Optional[ResultCache] = None):
+        self.supabase = supabase_client
+        self.cache = cache if cache is not None else get_profile_cache()
+    
+    async def get_profile(self, user_id: str) -> Dict[str, Any]:
+        # Read-through: an empty dict is cached too, so users without a
+        # profiles row don't hit the database on every poll
+        profile = self.cache.get(user_id)
+        if profile is not None:
+            return profile
+        
+        with track_supabase_call("profiles", "select"):
+            response = await self.supabase.table("profiles").select(PROFILE_COLUMNS).eq("id", user_id).limit(1).execute()
+        profile = self._extract(response.data[0]) if response.data else {}
+        self.cache.set(user_id, profile)
+        return profile
+    
+    async def update_profile(self, user_id: str, profile_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        profile_update = {
+            "id": user_id,
+            **{field: profile_data.get(field) for field in PROFILE_FIELDS},
+            "updated_at": "now()"
+        }
+        
+        try:
+            with track_supabase_call("profiles", "upsert"):
+                response = await self.supabase.table("profiles").upsert(profile_update).execute()
+        except Exception:
+            # The write may or may not have landed
+            self.cache.delete(user_id)
+            raise
+        
+        if not response.data:
+            self.cache.delete(user_id)
+            return None
+        profile = self._extract(response.data[0])
+        self.cache.set(user_id, profile)
+        return profile
+    
+    @staticmethod
+    def _extract(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: row.get(field) for field in PROFILE_FIELDS}
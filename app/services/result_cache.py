@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.helpers import json_size
+
+# value, size in bytes, expiry on the monotonic clock
+CacheEntry = Tuple[Dict[str, Any], int, float]
+
+
+class ResultCache:
+    # LRU + TTL cache for deterministic algorithm results. Cached values are
+    # shared between callers and must be treated as read-only.
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, _, expires_at = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], size: Optional[int] = None) -> bool:
+        # Callers holding large values pass a size measured off the event loop
+        if not self.enabled:
+            return False
+        if size is None:
+            size = json_size(value)
+        if size > self.max_bytes:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, self._clock() + self.ttl_seconds)
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+        return True
+
+    def delete(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            enabled=settings.RESULT_CACHE_ENABLED,
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        )
+    return _result_cache
+
+
+_profile_cache: Optional[ResultCache] = None
+
+
+def get_profile_cache() -> ResultCache:
+    # Profiles only change through PUT /auth/profile, which writes through this
+    # cache; the TTL bounds staleness across worker processes
+    global _profile_cache
+    if _profile_cache is None:
+        _profile_cache = ResultCache(
+            enabled=settings.PROFILE_CACHE_ENABLED,
+            max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.PROFILE_CACHE_MAX_BYTES,
+            ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+        )
+    return _profile_cache
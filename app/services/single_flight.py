@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution. The shared work
+    # runs in its own task: a waiter that is cancelled stops waiting, the work
+    # carries on for everyone else (and still fills the result cache).
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        # Returns (result, shared); shared is True when another caller's execution was joined
+        if not self.enabled:
+            return await work(), False
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.shared += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # Exceptions reach every waiter through the shared task
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "shared": self.shared,
+        }
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight(enabled=settings.SINGLE_FLIGHT_ENABLED)
+    return _single_flight
@@ -1,5 +1,59 @@
-from typing import List, Dict, Any, Optional
-from supabase import Client
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Sequence, Tuple
+from supabase import Client, AsyncClient
+
+from app.core.metrics import track_supabase_call
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+# (column, descending) pairs
+OrderBy = Sequence[Tuple[str, bool]]
+
+
+def _quote_filter_value(value: Any) -> str:
+    # Timestamps contain ':' and '.', which PostgREST treats as syntax inside or=()
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(columns: Sequence[str], values: Sequence[Any], descending: bool = True) -> str:
+    # Rows strictly after `values` in (columns) order, as a PostgREST or=() body:
+    # a < x OR (a = x AND b < y) OR ...
+    op = "lt" if descending else "gt"
+    clauses = []
+    for i, column in enumerate(columns):
+        terms = [f"{columns[j]}.eq.{_quote_filter_value(values[j])}" for j in range(i)]
+        terms.append(f"{column}.{op}.{_quote_filter_value(values[i])}")
+        clauses.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(clauses)
+
+
+def apply_query_options(
+    query,
+    filters: Optional[Dict[str, Any]] = None,
+    in_filters: Optional[Dict[str, Sequence[Any]]] = None,
+    range_filters: Optional[Dict[str, Dict[str, Any]]] = None,
+    or_filter: Optional[str] = None,
+    order_by: Optional[OrderBy] = None
+):
+    if filters:
+        for key, value in filters.items():
+            query = query.eq(key, value)
+    if in_filters:
+        for key, values in in_filters.items():
+            query = query.in_(key, list(values))
+    if range_filters:
+        # {"created_at": {"gte": start, "lt": end}}
+        for key, bounds in range_filters.items():
+            for op, value in bounds.items():
+                if op not in RANGE_OPERATORS:
+                    raise ValueError(f"Unsupported range operator: {op}")
+                query = getattr(query, op)(key, value)
+    if or_filter:
+        query = query.or_(or_filter)
+    if order_by:
+        for column, descending in order_by:
+            query = query.order(column, desc=descending)
+    return query
 
 
 class SupabaseService:
@@ -8,48 +62,209 @@ class SupabaseService:
     
     def create_record(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            response = self.supabase.table(table).insert(data).execute()
+            with track_supabase_call(table, "insert"):
+                response = self.supabase.table(table).insert(data).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             raise Exception(f"Failed to create record: {str(e)}")
     
     def get_record(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         try:
-            response = self.supabase.table(table).select("*").eq("id", record_id).single().execute()
+            with track_supabase_call(table, "select"):
+                response = self.supabase.table(table).select("*").eq("id", record_id).single().execute()
             return response.data
         except Exception:
             return None
     
-    def get_records(self, table: str, filters: Optional[Dict[str, Any]] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_records(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        columns: str = "*",
+        order_by: Optional[OrderBy] = None,
+        in_filters: Optional[Dict[str, Sequence[Any]]] = None,
+        range_filters: Optional[Dict[str, Dict[str, Any]]] = None,
+        or_filter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         try:
-            query = self.supabase.table(table).select("*")
+            query = apply_query_options(
+                self.supabase.table(table).select(columns),
+                filters=filters,
+                in_filters=in_filters,
+                range_filters=range_filters,
+                or_filter=or_filter,
+                order_by=order_by
+            )
             
-            if filters:
-                for key, value in filters.items():
-                    query = query.eq(key, value)
-            
-            response = query.limit(limit).execute()
+            with track_supabase_call(table, "select"):
+                response = query.limit(limit).execute()
             return response.data or []
         except Exception as e:
             raise Exception(f"Failed to get records: {str(e)}")
     
+    def iter_records(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+        key_columns: Sequence[str] = ("created_at", "id"),
+        descending: bool = True,
+        chunk_size: int = 500
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # Walks the whole table in key order and yields one keyset page at a
+        # time; key_columns must be selected and together unique
+        after = None
+        while True:
+            rows = self.get_records(
+                table,
+                filters=filters,
+                limit=chunk_size,
+                columns=columns,
+                order_by=[(column, descending) for column in key_columns],
+                or_filter=keyset_filter(key_columns, after, descending) if after else None
+            )
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            after = [rows[-1][column] for column in key_columns]
+    
     def update_record(self, table: str, record_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            response = self.supabase.table(table).update(data).eq("id", record_id).execute()
+            with track_supabase_call(table, "update"):
+                response = self.supabase.table(table).update(data).eq("id", record_id).execute()
             return response.data[0] if response.data else {}
         except Exception as e:
             raise Exception(f"Failed to update record: {str(e)}")
     
     def delete_record(self, table: str, record_id: str) -> bool:
         try:
-            self.supabase.table(table).delete().eq("id", record_id).execute()
+            with track_supabase_call(table, "delete"):
+                self.supabase.table(table).delete().eq("id", record_id).execute()
             return True
         except Exception as e:
             raise Exception(f"Failed to delete record: {str(e)}")
     
     def execute_rpc(self, function_name: str, params: Dict[str, Any]) -> Any:
         try:
-            response = self.supabase.rpc(function_name, params).execute()
+            with track_supabase_call(function_name, "rpc"):
+                response = self.supabase.rpc(function_name, params).execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Failed to execute RPC: {str(e)}")
+
+
+class AsyncSupabaseService:
+    def __init__(self, supabase_client: AsyncClient):
+        self.supabase = supabase_client
+    
+    async def create_record(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            with track_supabase_call(table, "insert"):
+                response = await self.supabase.table(table).insert(data).execute()
+            return response.data[0] if response.data else {}
+        except Exception as e:
+            raise Exception(f"Failed to create record: {str(e)}")
+    
+    async def create_records(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        try:
+            with track_supabase_call(table, "insert"):
+                response = await self.supabase.table(table).insert(rows).execute()
+            return response.data or []
+        except Exception as e:
+            raise Exception(f"Failed to create records: {str(e)}")
+    
+    async def upsert_records(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        try:
+            with track_supabase_call(table, "upsert"):
+                response = await self.supabase.table(table).upsert(rows).execute()
+            return response.data or []
+        except Exception as e:
+            raise Exception(f"Failed to upsert records: {str(e)}")
+    
+    async def get_record(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with track_supabase_call(table, "select"):
+                response = await self.supabase.table(table).select("*").eq("id", record_id).single().execute()
+            return response.data
+        except Exception:
+            return None
+    
+    async def get_records(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        columns: str = "*",
+        order_by: Optional[OrderBy] = None,
+        in_filters: Optional[Dict[str, Sequence[Any]]] = None,
+        range_filters: Optional[Dict[str, Dict[str, Any]]] = None,
+        or_filter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        try:
+            query = apply_query_options(
+                self.supabase.table(table).select(columns),
+                filters=filters,
+                in_filters=in_filters,
+                range_filters=range_filters,
+                or_filter=or_filter,
+                order_by=order_by
+            )
+            
+            with track_supabase_call(table, "select"):
+                response = await query.limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            raise Exception(f"Failed to get records: {str(e)}")
+    
+    async def iter_records(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+        key_columns: Sequence[str] = ("created_at", "id"),
+        descending: bool = True,
+        chunk_size: int = 500
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        # Walks the whole table in key order and yields one keyset page at a
+        # time; key_columns must be selected and together unique
+        after = None
+        while True:
+            rows = await self.get_records(
+                table,
+                filters=filters,
+                limit=chunk_size,
+                columns=columns,
+                order_by=[(column, descending) for column in key_columns],
+                or_filter=keyset_filter(key_columns, after, descending) if after else None
+            )
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            after = [rows[-1][column] for column in key_columns]
+    
+    async def update_record(self, table: str, record_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            with track_supabase_call(table, "update"):
+                response = await self.supabase.table(table).update(data).eq("id", record_id).execute()
+            return response.data[0] if response.data else {}
+        except Exception as e:
+            raise Exception(f"Failed to update record: {str(e)}")
+    
+    async def delete_record(self, table: str, record_id: str) -> bool:
+        try:
+            with track_supabase_call(table, "delete"):
+                await self.supabase.table(table).delete().eq("id", record_id).execute()
+            return True
+        except Exception as e:
+            raise Exception(f"Failed to delete record: {str(e)}")
+    
+    async def execute_rpc(self, function_name: str, params: Dict[str, Any]) -> Any:
+        try:
+            with track_supabase_call(function_name, "rpc"):
+                response = await self.supabase.rpc(function_name, params).execute()
             return response.data
         except Exception as e:
             raise Exception(f"Failed to execute RPC: {str(e)}")
\ No newline at end of file
@@ -1,8 +1,19 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
+import base64
+import binascii
+import decimal
+import hashlib
 import json
-from datetime import datetime
+import pickle
+import sys
+from datetime import datetime, timedelta
 import uuid
 
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see the "numpy" extra
+    np = None
+
 
 def generate_uuid() -> str:
     return str(uuid.uuid4())
@@ -24,6 +35,67 @@ def validate_json(data: str) -> bool:
         return False
 
 
+def canonical_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def json_size(data: Any) -> int:
+    # Serialized size without canonicalizing; ASCII output, so characters are bytes
+    return len(json.dumps(data, separators=(",", ":"), default=str))
+
+
+def _sort_dict_keys(data: Any) -> Any:
+    if isinstance(data, dict):
+        return sorted((key, _sort_dict_keys(value)) for key, value in data.items())
+    # Only nested containers need a walk; a flat list of numbers is kept as is.
+    # A dict behind a scalar in a mixed list stays unsorted, which can only
+    # cause a cache miss, never a wrong hit
+    if isinstance(data, list) and data and isinstance(data[0], (dict, list)):
+        return [_sort_dict_keys(value) for value in data]
+    return data
+
+
+def canonical_input_key(algorithm_type: str, input_data: Dict[str, Any]) -> str:
+    # Key order in the request body must not change the key. Hashes a pickle
+    # rather than sorted JSON: several times faster for large arrays, and this
+    # runs on the event loop before the cache lookup
+    algorithm_type = getattr(algorithm_type, "value", algorithm_type)
+    payload = pickle.dumps([algorithm_type, _sort_dict_keys(input_data)], protocol=5)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def int_to_decimal_string(value: int) -> str:
+    # str() refuses ints longer than sys.get_int_max_str_digits(). Build the
+    # value as a Decimal from binary halves instead (libmpdec multiplies
+    # large numbers fast), whose str() has no such limit.
+    limit = sys.get_int_max_str_digits()
+    if limit == 0 or value.bit_length() <= limit * 3:
+        return str(value)
+    if value < 0:
+        return "-" + int_to_decimal_string(-value)
+    
+    powers: Dict[int, decimal.Decimal] = {}
+    
+    def power_of_two(bits: int) -> decimal.Decimal:
+        if bits not in powers:
+            powers[bits] = decimal.Decimal(2) ** bits
+        return powers[bits]
+    
+    def convert(n: int, bits: int) -> decimal.Decimal:
+        if bits <= 1024:
+            return decimal.Decimal(n)
+        low_bits = bits >> 1
+        high = n >> low_bits
+        low = n - (high << low_bits)
+        return convert(low, low_bits) + convert(high, bits - low_bits) * power_of_two(low_bits)
+    
+    with decimal.localcontext() as ctx:
+        ctx.prec = decimal.MAX_PREC
+        ctx.Emax = decimal.MAX_EMAX
+        ctx.traps[decimal.Inexact] = True
+        return str(convert(value, value.bit_length()))
+
+
 def sanitize_dict(data: Dict[str, Any], allowed_keys: List[str]) -> Dict[str, Any]:
     return {k: v for k, v in data.items() if k in allowed_keys}
 
@@ -41,6 +113,44 @@ def paginate_results(items: List[Any], page: int, per_page: int) -> Dict[str, An
     }
 
 
+def compute_etag(data: Any, weak: bool = False) -> str:
+    digest = hashlib.sha256(canonical_json(data).encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def encode_cursor(values: List[Any]) -> str:
+    # Opaque to clients; the keyset values of the last row on a page
+    payload = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
 def format_error_response(error: str, details: Dict[str, Any] = None) -> Dict[str, Any]:
     response = {
         "error": error,
@@ -54,6 +164,9 @@ def format_error_response(error: str, details: Dict[str, Any] = None) -> Dict[st
 
 
 def validate_matrix(matrix: List[List[int]]) -> bool:
+    if np is not None and isinstance(matrix, np.ndarray):
+        return matrix.ndim == 2 and matrix.shape[0] > 0 and matrix.shape[1] > 0
+    
     if not matrix or not matrix[0]:
         return False
     
@@ -67,11 +180,29 @@ def validate_matrix(matrix: List[List[int]]) -> bool:
     return True
 
 
-def calculate_processing_time(start_time: datetime, end_time: datetime) -> str:
+def matrix_to_array(matrix: List[List[int]]) -> Optional["np.ndarray"]:
+    # np.asarray rejects ragged rows itself, so the shape check is a
+    # validate_matrix call on the array rather than a loop over the rows
+    try:
+        array = np.asarray(matrix)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    if not validate_matrix(array):
+        return None
+    if array.dtype.kind == "O" and not all(type(value) is int for value in array.flat):
+        # Object arrays are only expected for ints too large for int64
+        return None
+    if array.dtype.kind not in "iubfO":
+        return None
+    return array
+
+
+def calculate_processing_time(start_time: Union[datetime, float], end_time: Union[datetime, float]) -> str:
+    # Accepts datetimes or time.perf_counter() readings
     duration = end_time - start_time
-    total_seconds = duration.total_seconds()
+    total_seconds = duration.total_seconds() if isinstance(duration, timedelta) else duration
     
     if total_seconds < 1:
-        return f"{int(total_seconds * 1000)}ms"
+        return f"{total_seconds * 1000:.2f}ms"
     else:
         return f"{total_seconds:.2f}s"
\ No newline at end of file
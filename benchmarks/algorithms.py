@@ -0,0 +1,203 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.algorithm_service import AlgorithmService, np
+
+# name -> (kernel, input_data)
+BenchmarkCase = Tuple[Callable[[Dict[str, Any]], Dict[str, Any]], Dict[str, Any]]
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 1.25
+# Differences below this many seconds per call are timer noise, whatever the ratio
+NOISE_FLOOR = 2e-6
+SEED = 20240101
+
+SORTING_STRATEGIES = ("quicksort", "mergesort", "timsort")
+SORTING_SIZES = (1_000, 10_000, 100_000)
+MATRIX_SQUARE_SIZES = (16, 64, 128)
+
+
+def _array_shapes(size: int, rng: random.Random) -> Dict[str, List[int]]:
+    shuffled = [rng.randrange(-10**9, 10**9) for _ in range(size)]
+    ascending = sorted(shuffled)
+    half = ascending[: size // 2]
+    return {
+        "random": shuffled,
+        "sorted": ascending,
+        "reversed": ascending[::-1],
+        # Classic median-of-three killer shape
+        "organ_pipe": half + half[::-1],
+        "few_unique": [rng.randrange(4) for _ in range(size)],
+        "all_equal": [7] * size,
+    }
+
+
+def _matrix(rows: int, cols: int, rng: random.Random, magnitude: int = 100) -> List[List[int]]:
+    return [[rng.randrange(-magnitude, magnitude) for _ in range(cols)] for _ in range(rows)]
+
+
+def build_cases() -> Dict[str, BenchmarkCase]:
+    rng = random.Random(SEED)
+    cases: Dict[str, BenchmarkCase] = {}
+
+    fibonacci = AlgorithmService._fibonacci_algorithm
+    for n in (10, 1_000, 100_000, 1_000_000):
+        cases[f"fibonacci/n={n}"] = (fibonacci, {"n": n, "include_sequence": False})
+    cases["fibonacci/sequence/n=5000"] = (fibonacci, {"n": 5000, "include_sequence": True})
+    cases["fibonacci/modular/n=1e18"] = (fibonacci, {"n": 10**18, "modulus": 10**9 + 7})
+    cases["fibonacci/modular_slice/count=10000"] = (fibonacci, {"n": 10**18, "modulus": 10**9 + 7, "start": 10**17, "count": 10_000})
+
+    prime_check = AlgorithmService._prime_check_algorithm
+    for label, number in (
+        ("small_prime", 7919),
+        ("even", 2**64),
+        ("prime_2^61-1", 2**61 - 1),
+        # Carmichael number 12241 * 24481 * 36721: no factor below the trial
+        # division table, so it reaches Miller-Rabin
+        ("carmichael", 12241 * 24481 * 36721),
+        ("semiprime_64bit", 4294967291 * 4294967279),
+        ("prime_2^127-1", 2**127 - 1),
+        ("prime_2^521-1", 2**521 - 1),
+    ):
+        cases[f"prime_check/{label}"] = (prime_check, {"number": number})
+
+    factorize = AlgorithmService._factorize_algorithm
+    for label, number in (
+        ("smooth", 2**20 * 3**10 * 5**5),
+        ("semiprime_32bit", 65521 * 65519),
+        ("semiprime_64bit", 4294967291 * 4294967279),
+    ):
+        cases[f"factorize/{label}"] = (factorize, {"number": number})
+
+    sorting = AlgorithmService._sorting_algorithm
+    for size in SORTING_SIZES:
+        for shape, array in _array_shapes(size, rng).items():
+            for strategy in SORTING_STRATEGIES:
+                cases[f"sorting/{strategy}/{shape}/n={size}"] = (sorting, {"array": array, "algorithm": strategy})
+
+    matrix_multiply = AlgorithmService._matrix_multiply_algorithm
+    shapes = {f"square_{size}": (size, size, size) for size in MATRIX_SQUARE_SIZES}
+    shapes.update({
+        # (rows_a, cols_a = rows_b, cols_b)
+        "skinny_512x8x512": (512, 8, 512),
+        "wide_8x512x8": (8, 512, 8),
+        "vector_1x1024x1": (1, 1024, 1),
+    })
+    backends = ("python", "numpy") if np is not None else ("python",)
+    for label, (rows, inner, cols) in shapes.items():
+        matrix_a, matrix_b = _matrix(rows, inner, rng), _matrix(inner, cols, rng)
+        for backend in backends:
+            cases[f"matrix_multiply/{backend}/{label}"] = (
+                matrix_multiply, {"matrix_a": matrix_a, "matrix_b": matrix_b, "backend": backend}
+            )
+    # Entries beyond float64's exact range push numpy onto the int64 and object paths
+    for label, magnitude in (("int64_64", 2**40), ("bigint_64", 2**70)):
+        matrix_a, matrix_b = _matrix(64, 64, rng, magnitude), _matrix(64, 64, rng, magnitude)
+        for backend in backends:
+            cases[f"matrix_multiply/{backend}/{label}"] = (
+                matrix_multiply, {"matrix_a": matrix_a, "matrix_b": matrix_b, "backend": backend}
+            )
+    return cases
+
+
+def run_case(kernel: Callable[[Dict[str, Any]], Dict[str, Any]], input_data: Dict[str, Any], repeat: int = 5) -> Dict[str, Any]:
+    timer = timeit.Timer(lambda: kernel(input_data))
+    # autorange picks a loop count that takes at least 0.2s
+    loops, _ = timer.autorange()
+    timings = [elapsed / loops for elapsed in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def run(cases: Dict[str, BenchmarkCase], pattern: Optional[str] = None, repeat: int = 5) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name, (kernel, input_data) in cases.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = run_case(kernel, input_data, repeat)
+        print(f"{name:<55} {results[name]['min'] * 1000:>12.4f} ms", file=sys.stderr)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    noise_floor: float = NOISE_FLOOR
+) -> Dict[str, Dict[str, Any]]:
+    # min is the least noisy estimate of what the code costs; the ratio is
+    # current / baseline, so above threshold is slower
+    comparison = {}
+    for name, result in results.items():
+        if name not in baseline:
+            comparison[name] = {"status": "new", "ratio": None}
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        if abs(result["min"] - baseline[name]["min"]) < noise_floor:
+            status = "ok"
+        elif ratio > threshold:
+            status = "regression"
+        elif ratio < 1 / threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparison[name] = {"status": status, "ratio": round(ratio, 3)}
+    return comparison
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "numpy": getattr(np, "__version__", None),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the AlgorithmService kernels")
+    parser.add_argument("--filter", help="Only run cases whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="Write results and comparison as JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown ratio reported as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Merge these results into the baseline file")
+    args = parser.parse_args(argv)
+
+    results = run(build_cases(), args.filter, args.repeat)
+    baseline_doc = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"results": {}}
+    comparison = compare(results, baseline_doc["results"], args.threshold)
+
+    report = {"environment": environment(), "threshold": args.threshold, "results": results, "comparison": comparison}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+    if args.update_baseline:
+        baseline_doc["environment"] = report["environment"]
+        baseline_doc["results"].update(results)
+        args.baseline.write_text(json.dumps(baseline_doc, indent=2, sort_keys=True) + "\n")
+        return 0
+
+    regressions = {name: entry for name, entry in comparison.items() if entry["status"] == "regression"}
+    for name, entry in sorted(comparison.items()):
+        if entry["status"] != "ok":
+            print(f"{entry['status']:<12} {name} x{entry['ratio']}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
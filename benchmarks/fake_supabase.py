@@ -0,0 +1,494 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Namespace for deterministic load-test user ids, shared with benchmarks.load
+USER_NAMESPACE = uuid.UUID("6f1c1f4e-3f7a-4d55-9a53-1d7c2c1b9e10")
+ALGORITHM_TYPES = ("fibonacci", "prime_check", "sorting", "matrix_multiply")
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "columns", "on_conflict", "or", "and"}
+# Tables whose updated_at the README schema maintains with a trigger
+TOUCHED_TABLES = {"algorithm_requests"}
+OPERATORS = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "is")
+
+# (column, operator, negated, raw value) or ("and"/"or", [conditions])
+Condition = Tuple[Any, ...]
+
+
+def load_user_id(index: int) -> str:
+    return str(uuid.uuid5(USER_NAMESPACE, f"load-user-{index}"))
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _split_top_level(text: str) -> List[str]:
+    # Split on commas outside quotes and parentheses
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _parse_operation(column: str, expression: str) -> Condition:
+    negated = expression.startswith("not.")
+    if negated:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported operator: {op}")
+    return (column, op, negated, raw)
+
+
+def _parse_logic(body: str) -> List[Condition]:
+    # body of or=(...)/and(...): terms are col.op.value or nested and()/or()
+    conditions = []
+    for term in _split_top_level(body):
+        if term.startswith(("and(", "or(")):
+            kind, _, rest = term.partition("(")
+            conditions.append((kind, _parse_logic(rest[:-1])))
+        else:
+            column, _, expression = term.partition(".")
+            conditions.append(_parse_operation(column, expression))
+    return conditions
+
+
+def _coerce(raw: str, like: Any) -> Any:
+    if isinstance(like, bool):
+        return raw.lower() == "true"
+    if isinstance(like, (int, float)):
+        return float(raw)
+    return raw
+
+
+def _matches(row: Dict[str, Any], condition: Condition) -> bool:
+    if condition[0] in ("and", "or"):
+        results = (_matches(row, nested) for nested in condition[1])
+        return all(results) if condition[0] == "and" else any(results)
+
+    column, op, negated, raw = condition
+    value = row.get(column)
+    if op == "is":
+        target = {"null": None, "true": True, "false": False}[raw.lower()]
+        result = value is target
+    elif op == "in":
+        items = [_unquote(item) for item in _split_top_level(raw.strip("()"))]
+        result = value is not None and any(value == _coerce(item, value) for item in items)
+    elif value is None:
+        result = False
+    else:
+        other = _coerce(_unquote(raw), value)
+        result = {
+            "eq": value == other,
+            "neq": value != other,
+            "gt": value > other,
+            "gte": value >= other,
+            "lt": value < other,
+            "lte": value <= other,
+        }[op]
+    return not result if negated else result
+
+
+class _Descending:
+    # Sort key wrapper that reverses the order of any comparable value
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+class FakeSupabaseConfig:
+    def __init__(
+        self,
+        latency: float = 0.002,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        latencies: Optional[Dict[str, float]] = None,
+        error_rates: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        # Seconds added to every call; latencies/error_rates override per
+        # operation: select, insert, update, upsert, delete, rpc, auth
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.latencies = latencies or {}
+        self.error_rates = error_rates or {}
+        self.random = random.Random(seed)
+
+
+class FakeSupabase:
+    # In-memory stand-in for the PostgREST (/rest/v1) and GoTrue (/auth/v1)
+    # endpoints this app uses. Calls wait on asyncio.sleep, so injected latency
+    # behaves like a network round trip: it blocks the caller, not the loop.
+    def __init__(self, config: Optional[FakeSupabaseConfig] = None, jwt_secret: str = "fake-supabase-secret"):
+        self.config = config or FakeSupabaseConfig()
+        self.jwt_secret = jwt_secret
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.passwords: Dict[str, str] = {}
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.injected_seconds = 0.0
+        self.app = Starlette(routes=[
+            Route("/rest/v1/rpc/{function}", self._rpc, methods=["POST"]),
+            Route("/rest/v1/{table}", self._table, methods=["GET", "POST", "PATCH", "DELETE"]),
+            Route("/auth/v1/token", self._token, methods=["POST"]),
+            Route("/auth/v1/signup", self._signup, methods=["POST"]),
+            Route("/auth/v1/user", self._current_user, methods=["GET"]),
+            Route("/auth/v1/admin/users/{user_id}", self._admin_user, methods=["GET"]),
+        ])
+
+    def transport(self) -> httpx.ASGITransport:
+        return httpx.ASGITransport(app=self.app)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+            "injected_latency_seconds": round(self.injected_seconds, 3),
+            "rows": {table: len(rows) for table, rows in self.tables.items()},
+        }
+
+    # Seeding
+
+    def add_user(self, email: str, password: str = "password", user_id: Optional[str] = None, app_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        user = {
+            "id": user_id or str(uuid.uuid4()),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "email_confirmed_at": _now(),
+            "app_metadata": {"provider": "email", **(app_metadata or {})},
+            "user_metadata": {},
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        self.users[user["id"]] = user
+        self.passwords[email] = password
+        return user
+
+    def issue_token(self, user: Dict[str, Any], expires_in: int = 3600) -> str:
+        now = int(time.time())
+        return jwt.encode({
+            "sub": user["id"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": user["email"],
+            "app_metadata": user["app_metadata"],
+            "user_metadata": user["user_metadata"],
+            "iat": now,
+            "exp": now + expires_in,
+        }, self.jwt_secret, algorithm="HS256")
+
+    def seed_load_users(self, users: int, history: int = 0) -> List[Dict[str, Any]]:
+        # Deterministic ids, so a separate load generator process can mint matching tokens
+        rng = random.Random(0)
+        seeded = []
+        start = datetime.utcnow() - timedelta(days=30)
+        for index in range(users):
+            user = self.add_user(f"load-user-{index}@example.com", user_id=load_user_id(index))
+            self.insert("profiles", {"id": user["id"], "first_name": f"User {index}", "last_name": None, "avatar_url": None, "preferences": {}})
+            for i in range(history):
+                created = start + timedelta(seconds=i * 60 + rng.random())
+                self.insert("algorithm_requests", {
+                    "user_id": user["id"],
+                    "algorithm_type": rng.choice(ALGORITHM_TYPES),
+                    "input_data": {"n": i},
+                    "status": "completed",
+                    "result": {"result": i},
+                    "error": None,
+                    "created_at": created.isoformat(),
+                    "completed_at": (created + timedelta(milliseconds=5)).isoformat(),
+                    "updated_at": (created + timedelta(milliseconds=5)).isoformat(),
+                    "compute_ms": 1.0,
+                })
+            seeded.append(user)
+        return seeded
+
+    # Storage
+
+    def insert(self, table: str, row: Dict[str, Any], upsert: bool = False) -> Dict[str, Any]:
+        rows = self.tables.setdefault(table, {})
+        row = {key: (_now() if value == "now()" else value) for key, value in row.items()}
+        row.setdefault("id", str(uuid.uuid4()))
+        existing = rows.get(row["id"])
+        if existing is not None:
+            if not upsert:
+                raise KeyError(row["id"])
+            existing.update(row)
+            self._touch(table, existing)
+            return existing
+        row.setdefault("created_at", _now())
+        if table in TOUCHED_TABLES:
+            row.setdefault("updated_at", _now())
+        rows[row["id"]] = row
+        return row
+
+    @staticmethod
+    def _touch(table: str, row: Dict[str, Any]) -> None:
+        # The BEFORE UPDATE trigger from the README schema
+        if table in TOUCHED_TABLES:
+            row["updated_at"] = _now()
+
+    def select(self, table: str, conditions: List[Condition], order: List[Tuple[str, bool]] = (), offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = [row for row in self.tables.get(table, {}).values() if all(_matches(row, c) for c in conditions)]
+        if order:
+            # NULLs sort last in either direction
+            rows.sort(key=lambda row: tuple(
+                (row.get(column) is None, _Descending(row.get(column)) if descending else row.get(column))
+                for column, descending in order
+            ))
+        end = None if limit is None else offset + limit
+        return rows[offset:end]
+
+    # HTTP handlers
+
+    async def _inject(self, operation: str) -> Optional[Response]:
+        config = self.config
+        self.calls[operation] += 1
+        delay = config.latencies.get(operation, config.latency)
+        if config.jitter:
+            delay += config.random.uniform(0, config.jitter)
+        if delay > 0:
+            self.injected_seconds += delay
+            await asyncio.sleep(delay)
+        if config.random.random() < config.error_rates.get(operation, config.error_rate):
+            self.errors[operation] += 1
+            return JSONResponse(
+                {"code": "FAKE503", "message": f"Injected {operation} failure", "details": None, "hint": None},
+                status_code=503,
+            )
+        return None
+
+    @staticmethod
+    def _conditions(request: Request) -> List[Condition]:
+        conditions = []
+        for key, value in request.query_params.multi_items():
+            if key in ("or", "and"):
+                conditions.append((key, _parse_logic(value[1:-1])))
+            elif key not in RESERVED_PARAMS:
+                conditions.append(_parse_operation(key, value))
+        return conditions
+
+    @staticmethod
+    def _project(rows: List[Dict[str, Any]], select: str) -> List[Dict[str, Any]]:
+        if not select or select == "*":
+            return [dict(row) for row in rows]
+        columns = [column.strip() for column in select.split(",")]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    @staticmethod
+    def _error(status_code: int, code: str, message: str) -> JSONResponse:
+        return JSONResponse({"code": code, "message": message, "details": None, "hint": None}, status_code=status_code)
+
+    async def _table(self, request: Request) -> Response:
+        table = request.path_params["table"]
+        prefer = request.headers.get("prefer", "")
+        if request.method == "GET":
+            operation = "select"
+        elif request.method == "POST":
+            operation = "upsert" if "resolution=merge-duplicates" in prefer else "insert"
+        else:
+            operation = "update" if request.method == "PATCH" else "delete"
+
+        failure = await self._inject(operation)
+        if failure is not None:
+            return failure
+
+        try:
+            conditions = self._conditions(request)
+        except (ValueError, KeyError) as e:
+            return self._error(400, "PGRST100", str(e))
+
+        if operation == "select":
+            order = []
+            for term in filter(None, request.query_params.get("order", "").split(",")):
+                column, _, direction = term.partition(".")
+                order.append((column, direction.startswith("desc")))
+            limit = request.query_params.get("limit")
+            rows = self.select(
+                table,
+                conditions,
+                order,
+                int(request.query_params.get("offset", 0)),
+                int(limit) if limit is not None else None,
+            )
+            rows = self._project(rows, request.query_params.get("select", "*"))
+            headers = {}
+            if "count=exact" in prefer:
+                total = len(self.select(table, conditions))
+                headers["Content-Range"] = f"0-{max(len(rows) - 1, 0)}/{total}"
+            if request.headers.get("accept") == "application/vnd.pgrst.object+json":
+                if len(rows) != 1:
+                    return self._error(406, "PGRST116", f"JSON object requested, multiple (or no) rows returned: {len(rows)}")
+                return JSONResponse(rows[0], headers=headers)
+            return JSONResponse(rows, headers=headers)
+
+        if operation in ("insert", "upsert"):
+            payload = await request.json()
+            try:
+                rows = [self.insert(table, row, upsert=operation == "upsert") for row in (payload if isinstance(payload, list) else [payload])]
+            except KeyError as e:
+                return self._error(409, "23505", f"duplicate key value violates unique constraint: {e}")
+            status_code = 201
+        elif operation == "update":
+            changes = await request.json()
+            rows = self.select(table, conditions)
+            for row in rows:
+                row.update({key: (_now() if value == "now()" else value) for key, value in changes.items()})
+                self._touch(table, row)
+            status_code = 200
+        else:
+            rows = self.select(table, conditions)
+            for row in rows:
+                del self.tables[table][row["id"]]
+            status_code = 200
+
+        if "return=representation" not in prefer:
+            return Response(status_code=204)
+        return JSONResponse([dict(row) for row in rows], status_code=status_code)
+
+    async def _rpc(self, request: Request) -> Response:
+        failure = await self._inject("rpc")
+        if failure is not None:
+            return failure
+        function = request.path_params["function"]
+        params = await request.json() if await request.body() else {}
+        if function != "get_algorithm_stats":
+            return self._error(404, "PGRST202", f"Could not find the function public.{function}")
+        # Same shape as the SQL function: one row per (algorithm_type, status)
+        counts = Counter(
+            (row["algorithm_type"], row["status"])
+            for row in self.tables.get("algorithm_requests", {}).values()
+            if row.get("user_id") == params.get("p_user_id")
+        )
+        return JSONResponse([
+            {"algorithm_type": algorithm_type, "status": status, "count": count}
+            for (algorithm_type, status), count in counts.items()
+        ])
+
+    def _session(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "access_token": self.issue_token(user),
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "expires_at": int(time.time()) + 3600,
+            "refresh_token": uuid.uuid4().hex,
+            "user": user,
+        }
+
+    async def _token(self, request: Request) -> Response:
+        failure = await self._inject("auth")
+        if failure is not None:
+            return failure
+        body = await request.json()
+        email = body.get("email")
+        if email not in self.passwords or self.passwords[email] != body.get("password"):
+            return JSONResponse({"error": "invalid_grant", "error_description": "Invalid login credentials"}, status_code=400)
+        user = next(user for user in self.users.values() if user["email"] == email)
+        return JSONResponse(self._session(user))
+
+    async def _signup(self, request: Request) -> Response:
+        failure = await self._inject("auth")
+        if failure is not None:
+            return failure
+        body = await request.json()
+        if body.get("email") in self.passwords:
+            return JSONResponse({"code": 422, "msg": "User already registered"}, status_code=422)
+        user = self.add_user(body["email"], body.get("password", ""))
+        user["user_metadata"] = (body.get("data") or {})
+        return JSONResponse(self._session(user))
+
+    async def _current_user(self, request: Request) -> Response:
+        failure = await self._inject("auth")
+        if failure is not None:
+            return failure
+        token = request.headers.get("authorization", "").partition(" ")[2]
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], options={"verify_aud": False})
+        except jwt.InvalidTokenError as e:
+            return JSONResponse({"code": 401, "msg": str(e)}, status_code=401)
+        user = self.users.get(claims.get("sub"))
+        if user is None:
+            return JSONResponse({"code": 404, "msg": "User not found"}, status_code=404)
+        return JSONResponse(user)
+
+    async def _admin_user(self, request: Request) -> Response:
+        failure = await self._inject("auth")
+        if failure is not None:
+            return failure
+        user = self.users.get(request.path_params["user_id"])
+        if user is None:
+            return JSONResponse({"code": 404, "msg": "User not found"}, status_code=404)
+        return JSONResponse(user)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the fake Supabase backend; point SUPABASE_URL at it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.002, help="Seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    parser.add_argument("--latencies", type=json.loads, default={}, help='Per operation, e.g. \'{"rpc": 0.02}\'')
+    parser.add_argument("--jwt-secret", required=True, help="The API's JWT_SECRET_KEY, used to sign issued tokens")
+    parser.add_argument("--seed-users", type=int, default=20)
+    parser.add_argument("--seed-history", type=int, default=200, help="algorithm_requests rows per seeded user")
+    args = parser.parse_args(argv)
+
+    fake = FakeSupabase(
+        FakeSupabaseConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, latencies=args.latencies),
+        jwt_secret=args.jwt_secret,
+    )
+    fake.seed_load_users(args.seed_users, args.seed_history)
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import jwt
+
+from benchmarks.fake_supabase import FakeSupabase, FakeSupabaseConfig, load_user_id
+
+API_PREFIX = "/api/v1"
+DEFAULT_MIX = "process=6,history=2,stats=1,profile=1"
+PERCENTILES = (50, 95, 99)
+
+# endpoint name, status code (0 = transport error), latency seconds
+Sample = Tuple[str, int, float]
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for entry in mix.split(","):
+        name, _, weight = entry.partition("=")
+        if name.strip() not in ("process", "history", "stats", "profile"):
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name.strip()] = int(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    # Linear interpolation between closest ranks
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(ordered, p) * 1000, 3)
+    summary["max_ms"] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+    return summary
+
+
+def build_payloads(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    # A fixed pool: a small pool exercises the result cache and coalescing,
+    # a large one the kernels
+    payloads = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            payload = {"algorithm_type": "fibonacci", "input_data": {"n": rng.randrange(10, 5000)}}
+        elif kind == 1:
+            payload = {"algorithm_type": "prime_check", "input_data": {"number": rng.randrange(10**12, 10**18) | 1}}
+        elif kind == 2:
+            payload = {"algorithm_type": "sorting", "input_data": {"array": [rng.randrange(10**6) for _ in range(1000)], "algorithm": "mergesort"}}
+        else:
+            matrix = [[rng.randrange(100) for _ in range(16)] for _ in range(16)]
+            payload = {"algorithm_type": "matrix_multiply", "input_data": {"matrix_a": matrix, "matrix_b": matrix}}
+        payloads.append(payload)
+    return payloads
+
+
+def mint_tokens(users: int, secret: str) -> List[str]:
+    now = int(time.time())
+    return [
+        jwt.encode({
+            "sub": load_user_id(index),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": f"load-user-{index}@example.com",
+            "app_metadata": {"provider": "email"},
+            "iat": now,
+            "exp": now + 24 * 3600,
+        }, secret, algorithm="HS256")
+        for index in range(users)
+    ]
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, token: str, payloads: List[Dict[str, Any]], rng: random.Random) -> int:
+    headers = {"Authorization": f"Bearer {token}"}
+    if endpoint == "process":
+        response = await client.post(f"{API_PREFIX}/algorithms/process", json=rng.choice(payloads), headers=headers)
+    elif endpoint == "history":
+        response = await client.get(f"{API_PREFIX}/algorithms/history", params={"limit": 20}, headers=headers)
+    elif endpoint == "stats":
+        response = await client.get(f"{API_PREFIX}/algorithms/stats", headers=headers)
+    else:
+        response = await client.get(f"{API_PREFIX}/auth/profile", headers=headers)
+    return response.status_code
+
+
+async def _monitor_loop_lag(lags: List[float], interval: float = 0.01) -> None:
+    # How late the event loop wakes a sleeping task: time spent blocked by
+    # synchronous work anywhere in the process
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def generate_load(
+    client: httpx.AsyncClient,
+    tokens: List[str],
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    input_pool: int = 50,
+    seed: int = 0,
+) -> Tuple[List[Sample], List[float], float]:
+    rng = random.Random(seed)
+    payloads = build_payloads(input_pool, rng)
+    endpoints, weights = list(mix), list(mix.values())
+    samples: List[Sample] = []
+    lags: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            endpoint = worker_rng.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            try:
+                status_code = await _send(client, endpoint, worker_rng.choice(tokens), payloads, worker_rng)
+            except httpx.HTTPError:
+                status_code = 0
+            samples.append((endpoint, status_code, time.perf_counter() - start))
+
+    monitor = asyncio.create_task(_monitor_loop_lag(lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(rng.random())) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+    return samples, lags, elapsed
+
+
+def build_report(samples: List[Sample], lags: List[float], elapsed: float) -> Dict[str, Any]:
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+
+    def errors(group: List[Sample]) -> int:
+        return sum(1 for _, status_code, _ in group if status_code == 0 or status_code >= 400)
+
+    ordered_lags = sorted(lags)
+    report = {
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": summarize([latency for _, _, latency in samples], errors(samples), elapsed),
+        "endpoints": {},
+        "event_loop_lag": {
+            "p50_ms": round(percentile(ordered_lags, 50) * 1000, 3),
+            "p99_ms": round(percentile(ordered_lags, 99) * 1000, 3),
+            "max_ms": round(ordered_lags[-1] * 1000, 3) if ordered_lags else 0.0,
+        },
+    }
+    for endpoint, group in sorted(by_endpoint.items()):
+        summary = summarize([latency for _, _, latency in group], errors(group), elapsed)
+        summary["status_codes"] = {str(code): count for code, count in sorted(Counter(code for _, code, _ in group).items())}
+        report["endpoints"][endpoint] = summary
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    columns = ("requests", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    print(f"{'endpoint':<10}" + "".join(f"{column:>12}" for column in columns), file=sys.stderr)
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, summary in rows:
+        print(f"{name:<10}" + "".join(f"{summary[column]:>12}" for column in columns), file=sys.stderr)
+    lag = report["event_loop_lag"]
+    print(f"event loop lag: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, max {lag['max_ms']} ms", file=sys.stderr)
+    if "supabase" in report:
+        print(f"supabase calls: {report['supabase']['calls']}", file=sys.stderr)
+
+
+async def run_in_process(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported here: settings are read from the environment main() prepared
+    from app.core.config import settings
+    from app.core.database import close_async_clients, set_async_http_transport
+    from app.main import app
+
+    fake = FakeSupabase(
+        FakeSupabaseConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            latencies=args.latencies,
+            seed=args.seed,
+        ),
+        jwt_secret=settings.JWT_SECRET_KEY,
+    )
+    fake.seed_load_users(args.users, args.history)
+    await close_async_clients()
+    set_async_http_transport(fake.transport())
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=args.timeout) as client:
+                samples, lags, elapsed = await generate_load(
+                    client,
+                    mint_tokens(args.users, settings.JWT_SECRET_KEY),
+                    parse_mix(args.mix),
+                    args.concurrency,
+                    args.duration,
+                    args.input_pool,
+                    args.seed,
+                )
+    finally:
+        set_async_http_transport(None)
+    report = build_report(samples, lags, elapsed)
+    report["supabase"] = fake.stats()
+    return report
+
+
+async def run_against_url(args: argparse.Namespace) -> Dict[str, Any]:
+    # The server must run with SUPABASE_URL pointing at `python -m
+    # benchmarks.fake_supabase` seeded with the same --users
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        samples, lags, elapsed = await generate_load(
+            client,
+            mint_tokens(args.users, args.jwt_secret),
+            parse_mix(args.mix),
+            args.concurrency,
+            args.duration,
+            args.input_pool,
+            args.seed,
+        )
+    return build_report(samples, lags, elapsed)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Drive the API against a fake Supabase backend and report latency percentiles")
+    parser.add_argument("--url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--jwt-secret", default=os.environ.get("JWT_SECRET_KEY", "load-test-secret-not-for-production"), help="The server's JWT_SECRET_KEY")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history", type=int, default=200, help="Seeded algorithm_requests rows per user (in-process only)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights")
+    parser.add_argument("--input-pool", type=int, default=50, help="Distinct /process payloads")
+    parser.add_argument("--latency", type=float, default=0.002, help="Fake Supabase seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--latencies", type=json.loads, default={}, help='Per operation, e.g. \'{"rpc": 0.02}\'')
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        report = asyncio.run(run_against_url(args))
+    else:
+        # The in-process app needs settings; the fake ignores the URL and key.
+        # The rate limiter would throttle the harness itself.
+        os.environ.setdefault("SUPABASE_URL", "http://fake-supabase.local")
+        os.environ.setdefault("SUPABASE_KEY", "fake-anon-key")
+        os.environ.setdefault("JWT_SECRET_KEY", args.jwt_secret)
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+        report = asyncio.run(run_in_process(args))
+
+    report["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, default=str) + "\n")
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
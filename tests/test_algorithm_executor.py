@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.algorithm_executor import (
+    AlgorithmExecutor,
+    INLINE,
+    PROCESS,
+    THREAD,
+    estimate_algorithm_work,
+    parse_routes,
+)
+from app.services.algorithm_service import compute_algorithm
+
+
+class TestAlgorithmExecutor:
+    def test_parse_routes(self):
+        routes = parse_routes("sorting:thread, matrix_multiply:process,fibonacci:inline")
+        assert routes == {"sorting": THREAD, "matrix_multiply": PROCESS, "fibonacci": INLINE}
+        
+        with pytest.raises(ValueError):
+            parse_routes("sorting:gpu")
+    
+    def test_estimate_algorithm_work(self):
+        assert estimate_algorithm_work("fibonacci", {"n": 50}) == 50
+        assert estimate_algorithm_work("prime_check", {"number": 10**6}) == 400
+        assert estimate_algorithm_work("factorize", {"number": 10**12}) == 1000
+        assert estimate_algorithm_work("matrix_multiply", {"matrix_a": [[1, 2]] * 3, "matrix_b": [[1] * 4] * 2}) == 24
+        assert estimate_algorithm_work("sorting", {"array": "not-a-list"}) >= 1
+    
+    def test_small_inputs_run_inline(self):
+        executor = AlgorithmExecutor(routes={"sorting": PROCESS}, inline_threshold=100)
+        assert executor.select_mode("sorting", {"array": [3, 1, 2]}) == INLINE
+        assert executor.select_mode("sorting", {"array": list(range(1000))}) == PROCESS
+        
+        disabled = AlgorithmExecutor(enabled=False)
+        assert disabled.select_mode("sorting", {"array": list(range(1000))}) == INLINE
+    
+    @pytest.mark.asyncio
+    async def test_process_pool_executes_kernel(self):
+        executor = AlgorithmExecutor(max_workers=1, max_tasks_per_child=2)
+        try:
+            result = await executor.run(compute_algorithm, "sorting", {"array": [3, 1, 2], "algorithm": "mergesort"})
+            assert result["sorted"] == [1, 2, 3]
+            
+            with pytest.raises(ValueError, match="matrix_a"):
+                await executor.run(compute_algorithm, "matrix_multiply", {})
+        finally:
+            executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_thread_mode(self):
+        executor = AlgorithmExecutor(routes={"fibonacci": THREAD})
+        result = await executor.run(compute_algorithm, "fibonacci", {"n": 10})
+        assert result["result"] == 55
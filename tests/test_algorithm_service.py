@@ -0,0 +1,334 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.algorithm import AlgorithmRequest, AlgorithmStatus
+from app.schemas.algorithm import SORTING_MAX_LENGTH
+from app.services.algorithm_service import AlgorithmService, compute_algorithm
+from app.services.job_queue import JobQueue, JobQueueFullError
+from app.services.result_cache import ResultCache
+
+
+def make_async_client(rows=None):
+    # Chainable PostgREST builder whose execute() is awaitable
+    builder = MagicMock()
+    for method in ("table", "select", "insert", "update", "upsert", "eq", "limit", "single", "order", "or_", "in_", "rpc"):
+        getattr(builder, method).return_value = builder
+    builder.execute = AsyncMock(return_value=MagicMock(data=rows if rows is not None else [{"id": "req-1"}]))
+    return builder
+
+
+class TestAlgorithmService:
+    @pytest.mark.asyncio
+    async def test_process_algorithm_awaits_database(self):
+        client = make_async_client()
+        service = AlgorithmService(client)
+        
+        result = await service.process_algorithm("fibonacci", {"n": 10}, "user-1")
+        
+        assert result["request_id"] == "req-1"
+        assert result["result"]["result"] == 55
+        assert result["status"] == "completed"
+        # One insert before computing, one update after
+        assert client.execute.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_compute_time_is_measured_and_persisted(self, monkeypatch):
+        clock = iter([10.0, 10.25])
+        monkeypatch.setattr("app.services.algorithm_service.time", SimpleNamespace(perf_counter=lambda: next(clock)))
+        client = make_async_client()
+        service = AlgorithmService(client, result_cache=ResultCache())
+        
+        result = await service.process_algorithm("fibonacci", {"n": 10}, "user-1")
+        
+        assert result["processing_time"] == "250.00ms"
+        assert client.update.call_args[0][0]["compute_ms"] == 250.0
+    
+    @pytest.mark.asyncio
+    async def test_process_algorithm_marks_failure(self):
+        client = make_async_client()
+        service = AlgorithmService(client)
+        
+        with pytest.raises(ValidationError, match="matrix_a"):
+            await service.process_algorithm("matrix_multiply", {}, "user-1")
+        
+        update_payload = client.update.call_args[0][0]
+        assert update_payload["status"] == "failed"
+    
+    @pytest.mark.asyncio
+    async def test_submit_algorithm_runs_in_background(self):
+        client = make_async_client()
+        service = AlgorithmService(client)
+        job_queue = JobQueue(workers=1)
+        
+        try:
+            job = await service.submit_algorithm("fibonacci", {"n": 10}, "user-1", job_queue)
+            assert job.status == AlgorithmStatus.PENDING
+            assert client.insert.call_args[0][0]["status"] == "pending"
+            
+            await job_queue._queue.join()
+            
+            stored = await service.get_job("req-1", "user-1", job_queue)
+            assert stored["status"] == "completed"
+            assert stored["result"]["result"] == 55
+            # Other users cannot see the job
+            assert await service.get_job("req-1", "user-2", job_queue) is None
+        finally:
+            await job_queue.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_submit_algorithm_rejects_when_queue_full(self):
+        client = make_async_client()
+        service = AlgorithmService(client)
+        job_queue = JobQueue(workers=0, max_size=1)
+        
+        await service.submit_algorithm("fibonacci", {"n": 10}, "user-1", job_queue)
+        with pytest.raises(JobQueueFullError):
+            await service.submit_algorithm("fibonacci", {"n": 10}, "user-1", job_queue)
+    
+    @pytest.mark.asyncio
+    async def test_shutdown_fails_unfinished_jobs(self):
+        client = make_async_client()
+        service = AlgorithmService(client)
+        job_queue = JobQueue(workers=0, drain_timeout=0)
+        
+        job = await service.submit_algorithm("fibonacci", {"n": 10}, "user-1", job_queue)
+        await job_queue.shutdown()
+        
+        assert job.status == AlgorithmStatus.FAILED
+        assert job.error == "Interrupted by shutdown"
+        update_payload = client.update.call_args[0][0]
+        assert update_payload["status"] == "failed"
+        assert update_payload["error"] == "Interrupted by shutdown"
+    
+    @pytest.mark.asyncio
+    async def test_shutdown_drains_then_interrupts_running_jobs(self):
+        job_queue = JobQueue(workers=1, drain_timeout=0.05)
+        interrupted = []
+        
+        async def fast():
+            return {"result": 1}
+        
+        async def slow():
+            await asyncio.sleep(10)
+            return {"result": 2}
+        
+        async def on_interrupt(error):
+            interrupted.append(error)
+        
+        done = job_queue.submit(AlgorithmRequest(id="job-1", user_id="u", algorithm_type="fibonacci", input_data={}), fast, on_interrupt)
+        stuck = job_queue.submit(AlgorithmRequest(id="job-2", user_id="u", algorithm_type="fibonacci", input_data={}), slow, on_interrupt)
+        await job_queue.shutdown()
+        
+        assert done.status == AlgorithmStatus.COMPLETED
+        assert stuck.status == AlgorithmStatus.FAILED
+        assert interrupted == ["Interrupted by shutdown"]
+    
+    def test_fibonacci_fast_doubling(self):
+        sequence = [0, 1]
+        for _ in range(500):
+            sequence.append(sequence[-1] + sequence[-2])
+        
+        assert all(AlgorithmService._fibonacci_at(n) == sequence[n] for n in range(len(sequence)))
+        assert AlgorithmService._fibonacci_algorithm({"n": 10}) == {"result": 55, "sequence": sequence[:11]}
+        assert "sequence" not in AlgorithmService._fibonacci_algorithm({"n": 500})
+    
+    def test_fibonacci_modulus_and_slices(self):
+        sequence = [0, 1]
+        for _ in range(3000):
+            sequence.append(sequence[-1] + sequence[-2])
+        
+        for modulus in (2, 10, 1000, 64, 97, 10**9 + 7):
+            result = AlgorithmService._fibonacci_algorithm({"n": 2999, "modulus": modulus, "start": 2000, "count": 50})
+            assert result["result"] == sequence[2999] % modulus
+            assert result["sequence"] == [value % modulus for value in sequence[2000:2050]]
+        
+        assert AlgorithmService._pisano_period(10) == 60
+        assert AlgorithmService._pisano_period(7) == 16
+    
+    def test_fibonacci_big_n_is_returned_as_string(self):
+        result = AlgorithmService._fibonacci_algorithm({"n": 100_000})
+        assert isinstance(result["result"], str)
+        assert len(result["result"]) == 20899
+        # Trailing digits agree with the modular computation
+        assert int(result["result"][-12:]) == AlgorithmService._fibonacci_at(100_000, 10**12)
+        
+        with pytest.raises(ValueError):
+            AlgorithmService._fibonacci_algorithm({"n": 20_000_000})
+        with pytest.raises(ValueError):
+            AlgorithmService._fibonacci_algorithm({"n": -1})
+    
+    def test_prime_check_miller_rabin(self):
+        def is_prime(n):
+            return n >= 2 and all(n % i for i in range(2, int(n ** 0.5) + 1))
+        
+        assert all(AlgorithmService._prime_check_algorithm({"number": n})["is_prime"] == is_prime(n) for n in range(2, 20000))
+        assert AlgorithmService._prime_check_algorithm({"number": 91})["divisor"] == 7
+        # Largest 64-bit prime, and strong pseudoprimes to several small bases
+        assert AlgorithmService._prime_check_algorithm({"number": 18446744073709551557})["is_prime"] is True
+        for pseudoprime in (3215031751, 3474749660383, 341550071728321, 3825123056546413051):
+            assert AlgorithmService._prime_check_algorithm({"number": pseudoprime})["is_prime"] is False
+        
+        mersenne = AlgorithmService._prime_check_algorithm({"number": 2**127 - 1})
+        assert mersenne["is_prime"] is True
+        assert mersenne["method"] == "miller_rabin_probabilistic"
+    
+    @pytest.mark.parametrize("input_data", [
+        {},
+        {"number": "not-a-number"},
+        {"number": 1.5},
+        {"number": [7]},
+        {"number": 1},
+        {"number": 2**521 - 1},
+        {"number": 2**127 - 1, "rounds": 0},
+        {"number": 2**127 - 1, "rounds": "many"},
+    ])
+    def test_prime_check_rejects_bad_input(self, input_data):
+        with pytest.raises(ValidationError):
+            AlgorithmService._prime_check_algorithm(input_data)
+    
+    def test_factorize(self):
+        result = AlgorithmService._factorize_algorithm({"number": 600851475143})
+        assert result["factors"] == [71, 839, 1471, 6857]
+        
+        semiprime = AlgorithmService._factorize_algorithm({"number": 4294967291 * 4294967279})
+        assert semiprime["factors"] == [4294967279, 4294967291]
+        assert semiprime["prime_factors"] == {"4294967279": 1, "4294967291": 1}
+        
+        assert AlgorithmService._factorize_algorithm({"number": 2**64})["prime_factors"] == {"2": 64}
+        assert AlgorithmService._factorize_algorithm({"number": 10007})["is_prime"] is True
+        
+        with pytest.raises(ValueError):
+            AlgorithmService._factorize_algorithm({"number": 2**64 + 1})
+    
+    @pytest.mark.parametrize("algorithm", ["quicksort", "mergesort"])
+    def test_sorting_engines(self, algorithm):
+        rng = random.Random(7)
+        shapes = [
+            [],
+            [1],
+            [rng.randrange(-1000, 1000) for _ in range(5000)],
+            list(range(3000)),
+            list(range(3000, 0, -1)),
+            [rng.randrange(3) for _ in range(3000)],
+            list(range(1500)) + list(range(1500, 0, -1)),
+        ]
+        for array in shapes:
+            result = AlgorithmService._sorting_algorithm({"array": array, "algorithm": algorithm})
+            assert result["sorted"] == sorted(array)
+            assert result["original"] is array
+            assert result["algorithm"] == algorithm
+    
+    def test_heapsort_fallback_sorts_subrange(self):
+        rng = random.Random(3)
+        array = [rng.randrange(100) for _ in range(500)]
+        expected = array[:100] + sorted(array[100:400]) + array[400:]
+        AlgorithmService._heapsort(array, 100, 399)
+        assert array == expected
+    
+    def test_sorting_rejects_oversized_arrays(self):
+        with pytest.raises(ValueError):
+            AlgorithmService._sorting_algorithm({"array": [0] * (SORTING_MAX_LENGTH + 1)})
+    
+    @pytest.mark.parametrize("input_data", [
+        {},
+        {"array": [3, "a", 1]},
+        {"array": [1.5, 2]},
+        {"array": [[1], [2]]},
+        {"array": "321"},
+        {"array": [3, 1], "algorithm": "bogosort"},
+    ])
+    def test_sorting_rejects_bad_input(self, input_data):
+        with pytest.raises(ValidationError):
+            AlgorithmService._sorting_algorithm(input_data)
+    
+    @pytest.mark.parametrize("magnitude", [10, 2**20, 2**40, 2**80])
+    def test_matrix_backends_agree(self, magnitude):
+        pytest.importorskip("numpy")
+        rng = random.Random(magnitude)
+        matrix_a = [[rng.randrange(-magnitude, magnitude) for _ in range(7)] for _ in range(5)]
+        matrix_b = [[rng.randrange(-magnitude, magnitude) for _ in range(3)] for _ in range(7)]
+        
+        python_result = AlgorithmService._matrix_multiply_algorithm({"matrix_a": matrix_a, "matrix_b": matrix_b, "backend": "python"})
+        numpy_result = AlgorithmService._matrix_multiply_algorithm({"matrix_a": matrix_a, "matrix_b": matrix_b, "backend": "numpy"})
+        
+        assert numpy_result["result"] == python_result["result"]
+        assert all(type(value) is int for row in numpy_result["result"] for value in row)
+        assert numpy_result["dimensions"] == "5x7 × 7x3 = 5x3"
+    
+    @pytest.mark.parametrize("backend", ["python", "numpy"])
+    def test_matrix_shape_validation(self, backend):
+        if backend == "numpy":
+            pytest.importorskip("numpy")
+        with pytest.raises(ValueError, match="rectangular"):
+            AlgorithmService._matrix_multiply_algorithm({"matrix_a": [[1, 2], [3]], "matrix_b": [[1], [2]], "backend": backend})
+        with pytest.raises(ValueError, match="incompatible"):
+            AlgorithmService._matrix_multiply_algorithm({"matrix_a": [[1, 2]], "matrix_b": [[1, 2]], "backend": backend})
+    
+    @pytest.mark.asyncio
+    async def test_projection_applies_to_response_and_storage(self):
+        client = make_async_client()
+        service = AlgorithmService(client, result_cache=ResultCache())
+        input_data = {"array": [3, 1, 2], "algorithm": "mergesort"}
+        
+        full = await service.process_algorithm("sorting", input_data, "user-1")
+        assert full["result"] == {"original": [3, 1, 2], "sorted": [1, 2, 3], "algorithm": "mergesort"}
+        
+        slim = await service.process_algorithm("sorting", input_data, "user-1", include_inputs=False)
+        assert slim["result"] == {"sorted": [1, 2, 3], "algorithm": "mergesort"}
+        assert client.update.call_args[0][0]["result"] == slim["result"]
+        
+        only_sorted = await service.process_algorithm("sorting", input_data, "user-1", fields=["sorted"])
+        assert only_sorted["result"] == {"sorted": [1, 2, 3]}
+    
+    def test_compute_algorithm_drops_input_echoes(self):
+        result = compute_algorithm("matrix_multiply", {"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]})
+        assert "matrix_a" not in result and "matrix_b" not in result
+        assert result["result"] == [[11]]
+    
+    @pytest.mark.asyncio
+    async def test_process_batch_uses_bulk_writes(self):
+        client = make_async_client(rows=[{"id": "req-1"}, {"id": "req-2"}, {"id": "req-3"}])
+        service = AlgorithmService(client, result_cache=ResultCache())
+        items = [
+            {"algorithm_type": "fibonacci", "input_data": {"n": 10}},
+            {"algorithm_type": "matrix_multiply", "input_data": {}},
+            {"algorithm_type": "sorting", "input_data": {"array": [2, 1]}, "include_inputs": False},
+        ]
+        
+        results = await service.process_batch(items, "user-1")
+        
+        assert [item["status"] for item in results] == ["completed", "failed", "completed"]
+        assert results[0]["result"]["result"] == 55
+        assert "matrix_a" in results[1]["error"]
+        assert results[2]["result"] == {"sorted": [1, 2], "algorithm": "quicksort"}
+        # One insert and one upsert for the whole batch
+        assert client.execute.await_count == 2
+        assert len(client.insert.call_args[0][0]) == 3
+        upserted = client.upsert.call_args[0][0]
+        assert [row["id"] for row in upserted] == ["req-1", "req-2", "req-3"]
+        assert all(row["user_id"] == "user-1" for row in upserted)
+    
+    @pytest.mark.asyncio
+    async def test_stats_come_from_grouped_rpc(self):
+        client = make_async_client(rows=[
+            {"algorithm_type": "fibonacci", "status": "completed", "count": 5},
+            {"algorithm_type": "fibonacci", "status": "failed", "count": 1},
+            {"algorithm_type": "sorting", "status": "processing", "count": 2},
+            {"algorithm_type": "sorting", "status": "completed", "count": 0},
+        ])
+        service = AlgorithmService(client)
+        
+        stats = await service.get_algorithm_stats("user-1")
+        
+        client.rpc.assert_called_once_with("get_algorithm_stats", {"p_user_id": "user-1"})
+        assert stats == {
+            "total_requests": 8,
+            "completed_requests": 5,
+            "failed_requests": 1,
+            "algorithm_usage": {"fibonacci": 6, "sorting": 2}
+        }
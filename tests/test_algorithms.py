@@ -1,11 +1,26 @@
+import csv
+import json
+import marshal
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 from app.main import app
+from app.api.deps import get_current_active_user
+from app.core.database import get_async_supabase_client
+from app.services.job_queue import JobQueue, get_job_queue
 
 client = TestClient(app)
 
 
+def make_async_builder(rows=None):
+    builder = MagicMock()
+    for method in ("table", "select", "insert", "update", "upsert", "eq", "limit", "single", "order", "or_", "in_", "rpc"):
+        getattr(builder, method).return_value = builder
+    builder.execute = AsyncMock(return_value=MagicMock(data=rows if rows is not None else [{"id": "test-request-id"}]))
+    return builder
+
+
 class TestAlgorithms:
     @patch('app.api.deps.get_current_active_user')
     @patch('app.services.algorithm_service.AlgorithmService')
@@ -117,7 +132,7 @@ class TestAlgorithms:
         assert response.status_code == 200
         data = response.json()
         assert "types" in data
-        assert len(data["types"]) == 4  # fibonacci, prime_check, sorting, matrix_multiply
+        assert len(data["types"]) == 5  # fibonacci, prime_check, factorize, sorting, matrix_multiply
     
     def test_invalid_algorithm_type(self):
         # Test with invalid algorithm type
@@ -130,4 +145,278 @@ class TestAlgorithms:
             headers={"Authorization": "Bearer test-token"}
         )
         
-        assert response.status_code == 422  # Validation error
\ No newline at end of file
+        assert response.status_code == 422  # Validation error    
+    def test_process_async_mode_returns_job(self):
+        builder = make_async_builder()
+        job_queue = JobQueue(workers=1)
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": "test-user-id", "email": "test@example.com"}
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        app.dependency_overrides[get_job_queue] = lambda: job_queue
+        try:
+            response = client.post(
+                "/api/v1/algorithms/process?async_mode=true",
+                json={"algorithm_type": "fibonacci", "input_data": {"n": 10}},
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 202
+            assert response.json()["request_id"] == "test-request-id"
+            assert response.headers["Location"].endswith("/algorithms/jobs/test-request-id")
+            
+            response = client.get(
+                "/api/v1/algorithms/jobs/test-request-id",
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 200
+            assert response.json()["status"] in ("pending", "processing", "completed")
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_history_keyset_pagination(self):
+        rows = [
+            {
+                "id": f"request-{i}",
+                "user_id": "test-user-id",
+                "algorithm_type": "sorting",
+                "input_data": {"array": [2, 1]},
+                "result": {"sorted": [1, 2]},
+                "status": "completed",
+                "created_at": f"2024-01-0{9 - i}T00:00:00+00:00",
+                "completed_at": None
+            }
+            for i in range(3)
+        ]
+        builder = make_async_builder(rows)
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": "test-user-id", "email": "test@example.com"}
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.get(
+                "/api/v1/algorithms/history?limit=2&algorithm_type=sorting",
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 200
+            assert [item["id"] for item in response.json()] == ["request-0", "request-1"]
+            # Type filter is pushed into the query, one row over the limit is fetched
+            builder.eq.assert_any_call("algorithm_type", "sorting")
+            builder.limit.assert_called_with(3)
+            builder.or_.assert_not_called()
+            cursor = response.headers["X-Next-Cursor"]
+            
+            builder.execute.return_value = MagicMock(data=rows[2:])
+            response = client.get(
+                f"/api/v1/algorithms/history?limit=2&cursor={cursor}",
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert [item["id"] for item in response.json()] == ["request-2"]
+            assert "X-Next-Cursor" not in response.headers
+            builder.or_.assert_called_once_with(
+                'created_at.lt."2024-01-08T00:00:00+00:00",'
+                'and(created_at.eq."2024-01-08T00:00:00+00:00",id.lt."request-1")'
+            )
+            
+            response = client.get(
+                "/api/v1/algorithms/history?cursor=not-a-cursor",
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 400
+        finally:
+            app.dependency_overrides.clear()
+    
+    @pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+    def test_export_streams_keyset_pages(self, export_format, monkeypatch):
+        monkeypatch.setattr("app.core.config.settings.EXPORT_CHUNK_SIZE", 2)
+        rows = [
+            {
+                "id": f"request-{i}",
+                "user_id": "test-user-id",
+                "algorithm_type": "fibonacci",
+                "input_data": {"n": i},
+                "result": {"result": i},
+                "status": "completed",
+                "error": None,
+                "created_at": f"2024-01-0{9 - i}T00:00:00+00:00",
+                "completed_at": None
+            }
+            for i in range(3)
+        ]
+        builder = make_async_builder()
+        builder.execute = AsyncMock(side_effect=[MagicMock(data=rows[:2]), MagicMock(data=rows[2:])])
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": "test-user-id", "email": "test@example.com"}
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.get(
+                f"/api/v1/algorithms/export?format={export_format}",
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 200
+            assert "attachment" in response.headers["Content-Disposition"]
+            lines = response.text.strip().splitlines()
+            if export_format == "ndjson":
+                assert [json.loads(line)["id"] for line in lines] == ["request-0", "request-1", "request-2"]
+            else:
+                parsed = list(csv.DictReader(lines))
+                assert [row["id"] for row in parsed] == ["request-0", "request-1", "request-2"]
+                assert json.loads(parsed[1]["input_data"]) == {"n": 1}
+            # Second page continues after the last row of the first
+            assert builder.execute.await_count == 2
+            builder.or_.assert_called_once()
+            assert 'id.lt."request-1"' in builder.or_.call_args[0][0]
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_types_served_precomputed_with_strong_etag(self):
+        response = client.get("/api/v1/algorithms/types", headers={"Accept-Encoding": "identity"})
+        etag = response.headers["ETag"]
+        assert not etag.startswith("W/")
+        assert "max-age" in response.headers["Cache-Control"]
+        
+        response = client.get("/api/v1/algorithms/types", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+    
+    def test_stats_weak_etag_tracks_latest_request(self, monkeypatch):
+        # One row shape serves both the version lookups and the stats RPC
+        row = {"id": "request-1", "created_at": "2024-01-01T00:00:00+00:00", "completed_at": None,
+               "updated_at": "2024-01-01T00:00:00+00:00", "algorithm_type": "fibonacci", "status": "pending", "count": 1}
+        builder = make_async_builder([row])
+        
+        async def get_client():
+            return builder
+        
+        async def verify(token):
+            return {"sub": "test-user-id"}
+        
+        monkeypatch.setattr("app.main.verify_supabase_jwt_async", verify)
+        monkeypatch.setattr("app.main.get_async_supabase_client", get_client)
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": "test-user-id", "email": "test@example.com"}
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.get("/api/v1/algorithms/stats", headers={"Authorization": "Bearer test-token"})
+            assert response.status_code == 200
+            etag = response.headers["ETag"]
+            assert etag.startswith("W/")
+            assert response.headers["Cache-Control"] == "private, no-cache"
+            
+            builder.rpc.reset_mock()
+            response = client.get(
+                "/api/v1/algorithms/stats",
+                headers={"Authorization": "Bearer test-token", "If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            builder.rpc.assert_not_called()
+            
+            # Only the status changed (pending -> processing, no completed_at yet)
+            builder.execute.return_value = MagicMock(data=[{**row, "status": "processing", "updated_at": "2024-01-01T00:00:01+00:00"}])
+            response = client.get(
+                "/api/v1/algorithms/stats",
+                headers={"Authorization": "Bearer test-token", "If-None-Match": etag}
+            )
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            etag = response.headers["ETag"]
+            
+            # A newer request row changes the ETag
+            builder.execute.return_value = MagicMock(data=[{**row, "id": "request-2", "created_at": "2024-01-02T00:00:00+00:00"}])
+            response = client.get(
+                "/api/v1/algorithms/stats",
+                headers={"Authorization": "Bearer test-token", "If-None-Match": etag}
+            )
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_process_reports_server_timing_phases(self, monkeypatch):
+        builder = make_async_builder()
+        monkeypatch.setattr("app.api.deps.verify_supabase_jwt", lambda token: {"sub": "test-user-id"})
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.post(
+                "/api/v1/algorithms/process",
+                json={"algorithm_type": "fibonacci", "input_data": {"n": 10}},
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 200
+            phases = dict(entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", "))
+            assert set(phases) == {"auth", "db_insert", "compute", "db_update", "serialize", "total"}
+            assert all(float(duration) >= 0 for duration in phases.values())
+            assert response.json()["processing_time"].endswith("ms")
+            assert builder.update.call_args[0][0]["compute_ms"] >= 0
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_process_rejects_invalid_kernel_input(self, monkeypatch):
+        builder = make_async_builder()
+        monkeypatch.setattr("app.api.deps.verify_supabase_jwt", lambda token: {"sub": "test-user-id"})
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.post(
+                "/api/v1/algorithms/process",
+                json={"algorithm_type": "prime_check", "input_data": {"number": "not-a-number"}},
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 422
+            assert response.json()["detail"][0]["loc"] == ["number"]
+            assert builder.update.call_args[0][0]["status"] == "failed"
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_process_rejects_mismatched_matrices(self, monkeypatch):
+        builder = make_async_builder()
+        monkeypatch.setattr("app.api.deps.verify_supabase_jwt", lambda token: {"sub": "test-user-id"})
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            for input_data in (
+                {"matrix_a": [[1, 2], [3]], "matrix_b": [[1], [2]]},
+                {"matrix_a": [[1, 2]], "matrix_b": [[1, 2]]},
+            ):
+                response = client.post(
+                    "/api/v1/algorithms/process",
+                    json={"algorithm_type": "matrix_multiply", "input_data": input_data},
+                    headers={"Authorization": "Bearer test-token"}
+                )
+                assert response.status_code == 422
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_admin_can_profile_a_request(self, monkeypatch):
+        builder = make_async_builder()
+        payload = {"sub": "admin-user-id", "app_metadata": {"role": "admin"}}
+        monkeypatch.setattr("app.api.deps.verify_supabase_jwt", lambda token: payload)
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.post(
+                "/api/v1/algorithms/process",
+                json={"algorithm_type": "fibonacci", "input_data": {"n": 10}},
+                headers={"Authorization": "Bearer test-token", "X-Profile": "true"}
+            )
+            assert response.status_code == 200
+            profile_id = response.headers["X-Profile-Id"]
+            
+            response = client.get(f"/api/v1/algorithms/profiles/{profile_id}", headers={"Authorization": "Bearer test-token"})
+            assert response.status_code == 200
+            report = response.json()
+            assert "_fibonacci_algorithm" in report["stats"]
+            assert [(call["table"], call["operation"]) for call in report["supabase_calls"]] == [
+                ("algorithm_requests", "insert"),
+                ("algorithm_requests", "update"),
+            ]
+            
+            response = client.get(
+                f"/api/v1/algorithms/profiles/{profile_id}?format=pstats",
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.headers["Content-Disposition"].startswith("attachment")
+            assert marshal.loads(response.content)
+            
+            # Non-admins can neither profile nor read profiles
+            payload["app_metadata"] = {}
+            response = client.post(
+                "/api/v1/algorithms/process?profile=true",
+                json={"algorithm_type": "fibonacci", "input_data": {"n": 10}},
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 403
+            response = client.get(f"/api/v1/algorithms/profiles/{profile_id}", headers={"Authorization": "Bearer test-token"})
+            assert response.status_code == 403
+        finally:
+            app.dependency_overrides.clear()
@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pydantic import ValidationError
+
+from app.services.algorithm_service import AlgorithmService
+from app.services.audit_logger import AuditLogger
+from app.services.result_cache import ResultCache
+from tests.test_algorithm_service import make_async_client
+
+
+def make_db_service():
+    db_service = MagicMock()
+    db_service.create_records = AsyncMock(return_value=[])
+    return db_service
+
+
+class TestAuditLogger:
+    @pytest.mark.asyncio
+    async def test_flushes_in_bulk_by_size(self):
+        db_service = make_db_service()
+        logger = AuditLogger(flush_size=3, flush_interval=10.0, db_service=db_service)
+        
+        for i in range(3):
+            await logger.log({"id": str(i)})
+        await asyncio.sleep(0.01)
+        
+        db_service.create_records.assert_awaited_once()
+        assert len(db_service.create_records.await_args.args[1]) == 3
+        assert logger.stats()["written"] == 3
+        await logger.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_flushes_by_interval(self):
+        db_service = make_db_service()
+        logger = AuditLogger(flush_size=100, flush_interval=0.02, db_service=db_service)
+        
+        await logger.log({"id": "a"})
+        await asyncio.sleep(0.1)
+        
+        assert logger.written == 1
+        await logger.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_drops_when_queue_full(self):
+        db_service = make_db_service()
+        release = asyncio.Event()
+        
+        async def slow_insert(table, rows):
+            await release.wait()
+            return rows
+        
+        db_service.create_records = AsyncMock(side_effect=slow_insert)
+        logger = AuditLogger(max_queue_size=1, flush_size=1, enqueue_timeout=0.01, db_service=db_service)
+        
+        await logger.log({"id": "a"})
+        await asyncio.sleep(0.01)  # flusher takes "a" and blocks on the insert
+        assert await logger.log({"id": "b"})
+        assert not await logger.log({"id": "c"})
+        assert logger.dropped == 1
+        
+        release.set()
+        await logger.shutdown()
+        assert logger.written == 2
+    
+    @pytest.mark.asyncio
+    async def test_shutdown_flushes_buffered_rows(self):
+        db_service = make_db_service()
+        logger = AuditLogger(flush_size=100, flush_interval=10.0, db_service=db_service)
+        
+        for i in range(5):
+            await logger.log({"id": str(i)})
+        await logger.shutdown()
+        
+        assert logger.written == 5
+        assert logger.stats()["queued"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_counts_failed_writes(self):
+        db_service = make_db_service()
+        db_service.create_records = AsyncMock(side_effect=Exception("boom"))
+        logger = AuditLogger(db_service=db_service)
+        
+        await logger.log({"id": "a"})
+        await logger.shutdown()
+        
+        assert logger.failed == 1
+        assert logger.written == 0
+    
+    @pytest.mark.asyncio
+    async def test_service_skips_database_on_request_path(self):
+        client = make_async_client()
+        db_service = make_db_service()
+        logger = AuditLogger(flush_size=100, flush_interval=10.0, db_service=db_service)
+        service = AlgorithmService(client, result_cache=ResultCache(enabled=False), audit_logger=logger)
+        
+        result = await service.process_algorithm("fibonacci", {"n": 10}, "user-1")
+        
+        assert result["result"]["result"] == 55
+        assert client.execute.await_count == 0
+        
+        await logger.shutdown()
+        row = db_service.create_records.await_args.args[1][0]
+        assert row["id"] == result["request_id"]
+        assert row["status"] == "completed"
+        assert row["result"]["result"] == 55
+    
+    @pytest.mark.asyncio
+    async def test_service_logs_failed_rows(self):
+        db_service = make_db_service()
+        logger = AuditLogger(db_service=db_service)
+        service = AlgorithmService(make_async_client(), audit_logger=logger)
+        
+        with pytest.raises(ValidationError):
+            await service.process_algorithm("matrix_multiply", {}, "user-1")
+        
+        await logger.shutdown()
+        row = db_service.create_records.await_args.args[1][0]
+        assert row["status"] == "failed"
+        assert "matrix_a" in row["error"]
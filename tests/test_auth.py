@@ -1,7 +1,13 @@
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 from app.main import app
+from app.api.deps import get_current_active_user
+from app.core.database import get_async_supabase_client
+from app.services import result_cache
+from app.services.result_cache import ResultCache
+from tests.test_algorithms import make_async_builder
 
 client = TestClient(app)
 
@@ -63,4 +69,68 @@ class TestAuth:
             "/api/v1/auth/me",
             headers={"Authorization": "Bearer invalid-token"}
         )
-        assert response.status_code == 401
\ No newline at end of file
+        assert response.status_code == 401
+    
+    def test_jwks_outage_is_not_reported_as_bad_token(self, monkeypatch):
+        def verify(token):
+            raise HTTPException(status_code=503, detail="JWKS unavailable: connection refused")
+        
+        monkeypatch.setattr("app.api.deps.verify_supabase_jwt", verify)
+        response = client.get("/api/v1/auth/me", headers={"Authorization": "Bearer test-token"})
+        
+        assert response.status_code == 503
+        assert response.json()["detail"] == "JWKS unavailable: connection refused"
+    
+    def test_profile_cached_with_etag(self, monkeypatch):
+        monkeypatch.setattr(result_cache, "_profile_cache", ResultCache())
+        builder = make_async_builder([{"id": "test-user-id", "first_name": "Ada", "preferences": {"theme": "dark"}}])
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": "test-user-id", "email": "test@example.com"}
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            response = client.get("/api/v1/auth/profile", headers={"Authorization": "Bearer test-token"})
+            assert response.status_code == 200
+            assert response.json()["first_name"] == "Ada"
+            etag = response.headers["ETag"]
+            
+            response = client.get(
+                "/api/v1/auth/profile",
+                headers={"Authorization": "Bearer test-token", "If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert response.content == b""
+            # Second read came from the cache
+            assert builder.execute.await_count == 1
+            
+            builder.execute.return_value = MagicMock(data=[{"id": "test-user-id", "first_name": "Grace"}])
+            response = client.put(
+                "/api/v1/auth/profile",
+                json={"first_name": "Grace"},
+                headers={"Authorization": "Bearer test-token"}
+            )
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            
+            # PUT wrote through, so the stale ETag no longer matches and no query is made
+            response = client.get(
+                "/api/v1/auth/profile",
+                headers={"Authorization": "Bearer test-token", "If-None-Match": etag}
+            )
+            assert response.status_code == 200
+            assert response.json()["first_name"] == "Grace"
+            assert builder.execute.await_count == 2
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_missing_profile_returns_basic_profile(self, monkeypatch):
+        monkeypatch.setattr(result_cache, "_profile_cache", ResultCache())
+        builder = make_async_builder([])
+        app.dependency_overrides[get_current_active_user] = lambda: {"id": "test-user-id", "email": "test@example.com"}
+        app.dependency_overrides[get_async_supabase_client] = lambda: builder
+        try:
+            for _ in range(2):
+                response = client.get("/api/v1/auth/profile", headers={"Authorization": "Bearer test-token"})
+                assert response.status_code == 200
+                assert response.json()["first_name"] is None
+            assert builder.execute.await_count == 1
+        finally:
+            app.dependency_overrides.clear()
@@ -0,0 +1,35 @@
+import json
+
+from app.services.algorithm_service import AlgorithmService
+from benchmarks.algorithms import BASELINE_PATH, build_cases, compare, run_case
+
+
+class TestBenchmarks:
+    def test_cases_cover_adversarial_shapes(self):
+        cases = build_cases()
+        assert any(name.startswith("sorting/mergesort/organ_pipe") for name in cases)
+        assert any(name.startswith("matrix_multiply/python/skinny") for name in cases)
+    
+    def test_run_case_reports_per_call_seconds(self):
+        result = run_case(AlgorithmService._fibonacci_algorithm, {"n": 10}, repeat=2)
+        assert result["repeat"] == 2
+        assert 0 < result["min"] <= result["median"]
+    
+    def test_compare_flags_regressions_beyond_threshold(self):
+        baseline = {"a": {"min": 0.010}, "b": {"min": 0.010}, "c": {"min": 0.010}, "tiny": {"min": 1e-7}}
+        results = {"a": {"min": 0.011}, "b": {"min": 0.020}, "c": {"min": 0.005}, "tiny": {"min": 5e-7}, "d": {"min": 0.001}}
+        
+        comparison = compare(results, baseline, threshold=1.25)
+        
+        assert {name: entry["status"] for name, entry in comparison.items()} == {
+            "a": "ok",
+            "b": "regression",
+            "c": "improvement",
+            "tiny": "ok",
+            "d": "new",
+        }
+        assert comparison["b"]["ratio"] == 2.0
+    
+    def test_baseline_covers_every_case(self):
+        baseline = json.loads(BASELINE_PATH.read_text())["results"]
+        assert set(build_cases()) <= set(baseline)
@@ -0,0 +1,91 @@
+import httpx
+import pytest
+from supabase import AsyncClientOptions, acreate_client
+
+from app.core.config import settings
+from app.core.database import close_async_clients, set_async_http_transport
+from app.main import app
+from app.services.supabase_service import AsyncSupabaseService, keyset_filter
+from benchmarks.fake_supabase import FakeSupabase, FakeSupabaseConfig, load_user_id
+from benchmarks.load import build_report, generate_load, mint_tokens, parse_mix, percentile
+
+
+async def make_service(fake):
+    http_client = httpx.AsyncClient(transport=fake.transport())
+    client = await acreate_client("http://fake-supabase.local", "anon", options=AsyncClientOptions(httpx_client=http_client))
+    return AsyncSupabaseService(client)
+
+
+class TestFakeSupabase:
+    @pytest.mark.asyncio
+    async def test_postgrest_round_trip(self):
+        fake = FakeSupabase(FakeSupabaseConfig(latency=0))
+        service = await make_service(fake)
+        
+        rows = await service.create_records("algorithm_requests", [
+            {"user_id": "u1", "algorithm_type": "fibonacci", "status": "completed", "created_at": f"2024-01-0{i}T00:00:00"}
+            for i in range(1, 6)
+        ])
+        assert len(rows) == 5 and all(row["id"] for row in rows)
+        
+        page = await service.get_records(
+            "algorithm_requests",
+            filters={"user_id": "u1"},
+            limit=2,
+            columns="id,created_at",
+            order_by=(("created_at", True), ("id", True)),
+            or_filter=keyset_filter(("created_at", "id"), ("2024-01-04T00:00:00", rows[3]["id"]))
+        )
+        assert [row["created_at"] for row in page] == ["2024-01-03T00:00:00", "2024-01-02T00:00:00"]
+        
+        await service.update_record("algorithm_requests", rows[0]["id"], {"status": "failed"})
+        assert (await service.get_record("algorithm_requests", rows[0]["id"]))["status"] == "failed"
+        
+        await service.upsert_records("algorithm_requests", [{**rows[1], "status": "failed"}])
+        stats = await service.execute_rpc("get_algorithm_stats", {"p_user_id": "u1"})
+        assert sorted((row["status"], row["count"]) for row in stats) == [("completed", 3), ("failed", 2)]
+    
+    @pytest.mark.asyncio
+    async def test_latency_and_errors_are_injected_per_operation(self):
+        fake = FakeSupabase(FakeSupabaseConfig(latency=0, latencies={"select": 0.01}, error_rates={"insert": 1.0}))
+        service = await make_service(fake)
+        
+        with pytest.raises(Exception, match="Injected insert failure"):
+            await service.create_record("algorithm_requests", {"user_id": "u1"})
+        await service.get_records("algorithm_requests")
+        
+        assert fake.stats()["calls"] == {"insert": 1, "select": 1}
+        assert fake.stats()["errors"] == {"insert": 1}
+        assert fake.injected_seconds == pytest.approx(0.01)
+    
+    @pytest.mark.asyncio
+    async def test_load_generator_reports_percentiles(self):
+        fake = FakeSupabase(FakeSupabaseConfig(latency=0.001), jwt_secret=settings.JWT_SECRET_KEY)
+        fake.seed_load_users(3, history=30)
+        await close_async_clients()
+        set_async_http_transport(fake.transport())
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                samples, lags, elapsed = await generate_load(
+                    client,
+                    mint_tokens(3, settings.JWT_SECRET_KEY),
+                    parse_mix("process=1,history=1,stats=1,profile=1"),
+                    concurrency=2,
+                    duration=0.3,
+                    input_pool=4
+                )
+        finally:
+            await close_async_clients()
+            set_async_http_transport(None)
+        
+        report = build_report(samples, lags, elapsed)
+        assert report["overall"]["requests"] == len(samples) > 0
+        assert report["overall"]["errors"] == 0
+        assert report["overall"]["p50_ms"] <= report["overall"]["p99_ms"] <= report["overall"]["max_ms"]
+        assert fake.stats()["calls"]["select"] > 0
+        assert load_user_id(0) in fake.users
+    
+    def test_percentile_interpolates(self):
+        assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+        assert percentile([1.0], 99) == 1.0
+        assert percentile([], 50) == 0.0
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from unittest.mock import AsyncMock
+
+from app.core.metrics import size_bucket
+from app.main import app
+from app.services.algorithm_executor import AlgorithmExecutor
+from app.services.algorithm_service import compute_algorithm
+from app.services.supabase_service import AsyncSupabaseService
+from tests.test_algorithm_service import make_async_client
+
+client = TestClient(app)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetrics:
+    def test_metrics_endpoint_reports_route_templates(self):
+        route = "/api/v1/algorithms/jobs/{job_id}"
+        before = {code: sample("http_request_duration_seconds_count", method="GET", route=route, status=code) for code in ("401", "403")}
+        status = str(client.get("/api/v1/algorithms/jobs/some-id").status_code)
+        
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "http_request_duration_seconds_bucket" in response.text
+        assert "http_requests_in_flight" in response.text
+        assert sample("http_request_duration_seconds_count", method="GET", route=route, status=status) == before[status] + 1
+    
+    def test_size_bucket(self):
+        assert size_bucket(0) == "1e0"
+        assert size_bucket(999) == "1e2"
+        assert size_bucket(1000) == "1e3"
+        assert size_bucket(10**30) == "1e12"
+    
+    @pytest.mark.asyncio
+    async def test_compute_time_per_algorithm_and_size(self):
+        executor = AlgorithmExecutor(enabled=False)
+        labels = {"algorithm_type": "sorting", "size": "1e1", "mode": "inline"}
+        before = sample("algorithm_compute_seconds_count", **labels)
+        
+        await executor.run(compute_algorithm, "sorting", {"array": [3, 1, 2, 5, 4]})
+        
+        assert sample("algorithm_compute_seconds_count", **labels) == before + 1
+        assert sample("algorithm_computations_in_flight", algorithm_type="sorting") == 0
+    
+    @pytest.mark.asyncio
+    async def test_supabase_calls_timed_per_table_and_operation(self):
+        client_mock = make_async_client()
+        service = AsyncSupabaseService(client_mock)
+        calls_before = sample("supabase_call_duration_seconds_count", table="metrics_test", operation="insert")
+        errors_before = sample("supabase_call_errors_total", table="metrics_test", operation="update")
+        
+        await service.create_record("metrics_test", {"a": 1})
+        client_mock.execute = AsyncMock(side_effect=Exception("boom"))
+        with pytest.raises(Exception):
+            await service.update_record("metrics_test", "id-1", {"a": 2})
+        
+        assert sample("supabase_call_duration_seconds_count", table="metrics_test", operation="insert") == calls_before + 1
+        assert sample("supabase_call_errors_total", table="metrics_test", operation="update") == errors_before + 1
@@ -0,0 +1,99 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.deps import charge_algorithm_work
+from app.core.rate_limit import RateLimitMiddleware, TokenBucketLimiter, client_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_app(limiter):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, path_prefix="/api")
+    
+    @app.post("/api/process")
+    async def process(payload: dict, request: Request):
+        charge_algorithm_work(request, [(payload["algorithm_type"], payload["input_data"])])
+        return {"ok": True}
+    
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+    
+    return app
+
+
+class TestRateLimit:
+    def test_bucket_refills_over_the_window(self):
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(capacity=2, window=10, clock=clock)
+        
+        assert limiter.consume("user:a").allowed
+        assert limiter.consume("user:a").allowed
+        denied = limiter.consume("user:a")
+        assert not denied.allowed
+        assert denied.headers()["Retry-After"] == "5"
+        # Other keys have their own bucket
+        assert limiter.consume("user:b").allowed
+        
+        clock.now += 5
+        allowed = limiter.consume("user:a")
+        assert allowed.allowed and allowed.remaining == 0
+        assert allowed.headers()["RateLimit-Reset"] == "10"
+    
+    def test_cost_is_capped_at_capacity(self):
+        limiter = TokenBucketLimiter(capacity=10, window=10, clock=FakeClock())
+        assert limiter.consume("user:a", 1000).allowed
+        assert not limiter.consume("user:a").allowed
+    
+    def test_full_buckets_are_pruned(self):
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(capacity=5, window=5, shards=1, max_keys_per_shard=3, clock=clock)
+        for key in ("a", "b", "c"):
+            limiter.consume(key)
+        clock.now += 5
+        limiter.consume("d")
+        assert list(limiter._shards[0].buckets) == ["d"]
+    
+    @pytest.mark.asyncio
+    async def test_client_key_prefers_token_subject(self, monkeypatch):
+        async def verify(token):
+            return {"sub": "user-1"}
+        
+        monkeypatch.setattr("app.core.rate_limit.verify_supabase_jwt_async", verify)
+        scope = {"type": "http", "headers": [(b"authorization", b"Bearer token")], "client": ("10.0.0.1", 1234)}
+        assert await client_key(scope) == "user:user-1"
+        assert await client_key({**scope, "headers": []}) == "ip:10.0.0.1"
+    
+    def test_middleware_charges_estimated_work(self):
+        limiter = TokenBucketLimiter(capacity=10, window=60, work_per_token=1000, clock=FakeClock())
+        client = TestClient(make_app(limiter))
+        
+        response = client.post("/api/process", json={"algorithm_type": "fibonacci", "input_data": {"n": 10}})
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Remaining"] == "9"
+        assert response.headers["RateLimit-Policy"] == "10;w=60"
+        
+        # 20x20x20 matrices: 8000 work units, 8 tokens
+        matrix = [[1] * 20 for _ in range(20)]
+        response = client.post("/api/process", json={"algorithm_type": "matrix_multiply", "input_data": {"matrix_a": matrix, "matrix_b": matrix}})
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Remaining"] == "1"
+        
+        response = client.post("/api/process", json={"algorithm_type": "matrix_multiply", "input_data": {"matrix_a": matrix, "matrix_b": matrix}})
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        
+        response = client.post("/api/process", json={"algorithm_type": "fibonacci", "input_data": {"n": 10}})
+        assert response.status_code == 429
+        assert response.json() == {"detail": "Rate limit exceeded"}
+        
+        # Paths outside the prefix are not limited
+        assert client.get("/health").status_code == 200
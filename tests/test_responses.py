@@ -0,0 +1,113 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.responses import ORJSONFallbackResponse, model_response
+from app.schemas.algorithm import AlgorithmResult
+
+
+def make_app(**options):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **options)
+    
+    @app.get("/big")
+    async def big():
+        return ORJSONFallbackResponse({"sorted": list(range(5000))}, headers={"ETag": '"abc"'})
+    
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+    
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse("x" * 5000, media_type="image/png")
+    
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(100):
+                yield json.dumps({"i": i}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    return TestClient(app)
+
+
+class TestResponses:
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding("gzip, br", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+        assert negotiate_encoding("br;q=0, *", ["br", "gzip"]) == "gzip"
+        assert negotiate_encoding("identity", ["br", "gzip"]) is None
+    
+    def test_gzip_above_threshold(self):
+        client = make_app(encodings=["gzip"])
+        response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.json()["sorted"][-1] == 4999
+        assert "Accept-Encoding" in response.headers["Vary"]
+        # Encoded bytes differ from the identity body, so the ETag is weakened
+        assert response.headers["ETag"] == 'W/"abc"'
+    
+    def test_brotli_preferred_when_available(self):
+        pytest.importorskip("brotli")
+        client = make_app()
+        response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+        
+        assert response.headers["Content-Encoding"] == "br"
+        assert response.json()["sorted"][0] == 0
+    
+    def test_small_and_binary_bodies_pass_through(self):
+        client = make_app()
+        assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "Content-Encoding" not in client.get("/text", headers={"Accept-Encoding": "gzip"}).headers
+    
+    def test_streaming_response_is_compressed_incrementally(self):
+        client = make_app(encodings=["gzip"], minimum_size=10)
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["Content-Encoding"] == "gzip"
+            raw = b"".join(response.iter_raw())
+        lines = gzip.decompress(raw).decode().splitlines()
+        assert len(lines) == 100
+    
+    def test_orjson_response_falls_back_for_big_ints(self):
+        pytest.importorskip("orjson")
+        body = ORJSONFallbackResponse({"result": 2**70}).body
+        assert json.loads(body) == {"result": 2**70}
+        assert json.loads(ORJSONFallbackResponse({"result": [1, 2]}).body) == {"result": [1, 2]}
+    
+    @pytest.mark.parametrize("backend", ["orjson", "json"])
+    def test_model_response_keeps_endpoint_headers(self, monkeypatch, backend):
+        if backend == "orjson":
+            pytest.importorskip("orjson")
+        monkeypatch.setattr("app.core.responses.settings.JSON_RESPONSE_BACKEND", backend)
+        app = FastAPI()
+        
+        @app.get("/result", response_model=AlgorithmResult)
+        async def result(response: Response):
+            response.headers["Cache-Control"] = "private, max-age=60"
+            response.set_cookie("seen", "1")
+            data = {"request_id": "req-1", "algorithm_type": "sorting", "result": {"sorted": [1, 2]},
+                    "status": "completed", "cache_hit": True}
+            return model_response(AlgorithmResult, data, response, headers={"X-Cache": "HIT"})
+        
+        response = TestClient(app).get("/result")
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == "private, max-age=60"
+        assert response.headers["X-Cache"] == "HIT"
+        assert response.cookies["seen"] == "1"
+        # Only the model's fields are sent
+        assert response.json() == {"request_id": "req-1", "algorithm_type": "sorting", "result": {"sorted": [1, 2]},
+                                   "processing_time": None, "status": "completed"}
+    
+    def test_model_response_validates_before_encoding(self, monkeypatch):
+        pytest.importorskip("orjson")
+        monkeypatch.setattr("app.core.responses.settings.JSON_RESPONSE_BACKEND", "orjson")
+        with pytest.raises(ValidationError):
+            model_response(AlgorithmResult, {"request_id": "req-1", "algorithm_type": "unknown", "result": {}, "status": "completed"}, Response())
@@ -0,0 +1,84 @@
+import pytest
+
+from app.services.algorithm_service import AlgorithmService
+from app.services.result_cache import ResultCache
+from app.utils.helpers import canonical_input_key
+from tests.test_algorithm_service import make_async_client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache:
+    def test_canonical_key_ignores_key_order(self):
+        key_a = canonical_input_key("sorting", {"array": [3, 1], "algorithm": "mergesort"})
+        key_b = canonical_input_key("sorting", {"algorithm": "mergesort", "array": [3, 1]})
+        assert key_a == key_b
+        assert key_a != canonical_input_key("sorting", {"array": [1, 3], "algorithm": "mergesort"})
+    
+    def test_canonical_key_sorts_nested_dicts(self):
+        key_a = canonical_input_key("sorting", {"array": [{"b": 1, "a": 2}], "options": {"x": 1, "y": [1, 2]}})
+        key_b = canonical_input_key("sorting", {"options": {"y": [1, 2], "x": 1}, "array": [{"a": 2, "b": 1}]})
+        assert key_a == key_b
+        # JSON-equal values of different types must not share a key
+        assert canonical_input_key("fibonacci", {"n": 1}) != canonical_input_key("fibonacci", {"n": True})
+    
+    def test_lru_eviction_by_entries(self):
+        cache = ResultCache(max_entries=2)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.evictions == 1
+    
+    def test_byte_budget(self):
+        cache = ResultCache(max_bytes=40)
+        assert cache.set("a", {"v": "x" * 20})
+        assert cache.set("b", {"v": "y" * 20})
+        assert len(cache) == 1
+        assert cache.current_bytes <= 40
+        # Larger than the whole budget: never stored
+        assert not cache.set("c", {"v": "z" * 100})
+    
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl_seconds=10, clock=clock)
+        cache.set("a", {"v": 1})
+        clock.now = 9.9
+        assert cache.get("a") == {"v": 1}
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.current_bytes == 0
+    
+    @pytest.mark.asyncio
+    async def test_service_reuses_cached_result(self):
+        cache = ResultCache()
+        service = AlgorithmService(make_async_client(), result_cache=cache)
+        
+        first = await service.process_algorithm("fibonacci", {"n": 30}, "user-1")
+        second = await service.process_algorithm("fibonacci", {"n": 30}, "user-1")
+        
+        assert first["cache_hit"] is False
+        assert second["cache_hit"] is True
+        assert second["result"] == first["result"]
+    
+    @pytest.mark.asyncio
+    async def test_size_is_measured_with_the_result(self, monkeypatch):
+        # The service passes the size computed next to the kernel, so set()
+        # never serializes the value itself
+        monkeypatch.setattr("app.services.result_cache.json_size", lambda value: pytest.fail("sized on the event loop"))
+        cache = ResultCache()
+        service = AlgorithmService(make_async_client(), result_cache=cache)
+        
+        await service.process_algorithm("sorting", {"array": [3, 1, 2]}, "user-1")
+        assert cache.current_bytes > 0
@@ -0,0 +1,175 @@
+import json
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import JWKSKeySet, JWKSUnavailableError, VerifiedTokenCache, verify_supabase_jwt
+
+
+def make_jwk(private_key, kid):
+    algorithm = jwt.algorithms.RSAAlgorithm if isinstance(private_key, rsa.RSAPrivateKey) else jwt.algorithms.ECAlgorithm
+    jwk = json.loads(algorithm.to_jwk(private_key.public_key()))
+    jwk["kid"] = kid
+    return jwk
+
+
+@pytest.fixture
+def fresh_security(monkeypatch):
+    monkeypatch.setattr(security, "_token_cache", None)
+    monkeypatch.setattr(security, "_jwks_key_set", None)
+    return security
+
+
+class TestVerifiedTokenCache:
+    def test_expires_at_token_exp(self):
+        now = [1000.0]
+        cache = VerifiedTokenCache(clock=lambda: now[0])
+        cache.set("token", {"sub": "user-1", "exp": 1010})
+        
+        assert cache.get("token") == {"sub": "user-1", "exp": 1010}
+        now[0] = 1010.0
+        assert cache.get("token") is None
+        assert len(cache) == 0
+    
+    def test_bounded_and_skips_tokens_without_exp(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        exp = time.time() + 60
+        for token in ("a", "b", "c"):
+            cache.set(token, {"exp": exp})
+        cache.set("no-exp", {"sub": "user-1"})
+        
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("no-exp") is None
+
+
+class TestVerifySupabaseJwt:
+    def test_hs256_verified_once(self, fresh_security):
+        token = jwt.encode({"sub": "user-1", "exp": int(time.time()) + 60}, settings.JWT_SECRET_KEY, algorithm="HS256")
+        
+        with patch("app.core.security.jwt.decode", wraps=jwt.decode) as decode:
+            assert verify_supabase_jwt(token)["sub"] == "user-1"
+            assert verify_supabase_jwt(token)["sub"] == "user-1"
+        assert decode.call_count == 1
+    
+    def test_invalid_token_not_cached(self, fresh_security):
+        token = jwt.encode({"sub": "user-1", "exp": int(time.time()) + 60}, "wrong-secret", algorithm="HS256")
+        
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc:
+                verify_supabase_jwt(token)
+            assert exc.value.status_code == 401
+        assert len(security.get_token_cache()) == 0
+    
+    @pytest.mark.parametrize("algorithm,private_key", [
+        ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+    ])
+    def test_asymmetric_tokens_use_cached_jwks(self, fresh_security, monkeypatch, algorithm, private_key):
+        monkeypatch.setattr(settings, "JWT_JWKS_URL", "https://example.supabase.co/auth/v1/.well-known/jwks.json")
+        fetches = []
+        
+        def fetch(url):
+            fetches.append(url)
+            return {"keys": [make_jwk(private_key, "key-1")]}
+        
+        monkeypatch.setattr(JWKSKeySet, "_fetch_jwks", staticmethod(fetch))
+        for sub in ("user-1", "user-2"):
+            token = jwt.encode(
+                {"sub": sub, "exp": int(time.time()) + 60},
+                private_key,
+                algorithm=algorithm,
+                headers={"kid": "key-1"}
+            )
+            assert verify_supabase_jwt(token)["sub"] == sub
+        
+        assert len(fetches) == 1
+    
+    def test_jwks_outage_is_503(self, fresh_security, monkeypatch):
+        monkeypatch.setattr(settings, "JWT_JWKS_URL", "https://example.supabase.co/auth/v1/.well-known/jwks.json")
+        
+        def fetch(url):
+            raise ConnectionError("jwks down")
+        
+        monkeypatch.setattr(JWKSKeySet, "_fetch_jwks", staticmethod(fetch))
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        token = jwt.encode({"sub": "user-1"}, private_key, algorithm="RS256", headers={"kid": "key-1"})
+        
+        with pytest.raises(HTTPException) as exc:
+            verify_supabase_jwt(token)
+        assert exc.value.status_code == 503
+    
+    def test_asymmetric_rejected_without_jwks(self, fresh_security, monkeypatch):
+        monkeypatch.setattr(settings, "JWT_JWKS_URL", "")
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        token = jwt.encode({"sub": "user-1"}, private_key, algorithm="RS256")
+        
+        with pytest.raises(HTTPException):
+            verify_supabase_jwt(token)
+
+
+class TestJWKSKeySet:
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        now = [0.0]
+        fetches = []
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        
+        def fetch(url):
+            fetches.append(url)
+            return {"keys": [make_jwk(private_key, "key-1")]}
+        
+        key_set = JWKSKeySet("jwks", refresh_interval=600, min_refresh_interval=30, fetch=fetch, clock=lambda: now[0])
+        key_set.get_signing_key("key-1")
+        for _ in range(3):
+            with pytest.raises(jwt.InvalidTokenError):
+                key_set.get_signing_key("rotated")
+        assert len(fetches) == 1
+        
+        now[0] = 31.0
+        with pytest.raises(jwt.InvalidTokenError):
+            key_set.get_signing_key("rotated")
+        assert len(fetches) == 2
+    
+    def test_failed_refresh_keeps_keys_and_backs_off(self):
+        now = [0.0]
+        fetches = []
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        
+        def fetch(url):
+            fetches.append(url)
+            if len(fetches) > 1:
+                raise ConnectionError("jwks down")
+            return {"keys": [make_jwk(private_key, "key-1")]}
+        
+        key_set = JWKSKeySet("jwks", refresh_interval=600, min_refresh_interval=30, fetch=fetch, clock=lambda: now[0])
+        key = key_set.get_signing_key("key-1")
+        
+        # Stale keys are still served while the JWKS endpoint is down
+        now[0] = 600.0
+        for _ in range(3):
+            assert key_set.get_signing_key("key-1") is key
+        assert len(fetches) == 2
+        
+        now[0] = 630.0
+        assert key_set.get_signing_key("key-1") is key
+        assert len(fetches) == 3
+    
+    def test_failed_first_fetch_backs_off(self):
+        now = [0.0]
+        fetches = []
+        
+        def fetch(url):
+            fetches.append(url)
+            raise ConnectionError("jwks down")
+        
+        key_set = JWKSKeySet("jwks", refresh_interval=600, min_refresh_interval=30, fetch=fetch, clock=lambda: now[0])
+        for _ in range(3):
+            with pytest.raises(JWKSUnavailableError):
+                key_set.get_signing_key("key-1")
+        assert len(fetches) == 1
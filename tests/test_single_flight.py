@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.services.algorithm_service import AlgorithmService
+from app.services.result_cache import ResultCache
+from app.services.single_flight import SingleFlight
+from tests.test_algorithm_service import make_async_client
+
+
+class GatedExecutor:
+    # Holds every kernel run until release() so callers overlap
+    def __init__(self):
+        self.calls = 0
+        self.gate = asyncio.Event()
+    
+    async def run(self, kernel, algorithm_type, input_data):
+        self.calls += 1
+        await self.gate.wait()
+        return kernel(algorithm_type, input_data)
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        gate = asyncio.Event()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await gate.wait()
+            return {"value": 42}
+        
+        waiters = [asyncio.create_task(flight.run("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        outcomes = await asyncio.gather(*waiters)
+        
+        assert len(calls) == 1
+        assert [result for result, _ in outcomes] == [{"value": 42}] * 3
+        assert sorted(shared for _, shared in outcomes) == [False, True, True]
+        assert len(flight) == 0
+    
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+        gate = asyncio.Event()
+        
+        async def work():
+            await gate.wait()
+            raise ValueError("boom")
+        
+        waiters = [asyncio.create_task(flight.run("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        assert len(flight) == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+        gate = asyncio.Event()
+        
+        async def work():
+            await gate.wait()
+            return "done"
+        
+        first = asyncio.create_task(flight.run("key", work))
+        second = asyncio.create_task(flight.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        
+        assert await second == ("done", True)
+        assert first.cancelled()
+    
+    @pytest.mark.asyncio
+    async def test_service_coalesces_but_logs_every_request(self):
+        client = make_async_client()
+        executor = GatedExecutor()
+        service = AlgorithmService(client, executor=executor, result_cache=ResultCache(), single_flight=SingleFlight())
+        
+        requests = [
+            asyncio.create_task(service.process_algorithm("fibonacci", {"n": 20}, f"user-{i}"))
+            for i in range(5)
+        ]
+        await asyncio.sleep(0.01)
+        executor.gate.set()
+        results = await asyncio.gather(*requests)
+        
+        assert executor.calls == 1
+        assert all(result["result"]["result"] == 6765 for result in results)
+        assert [result["cache_hit"] for result in results].count(False) == 1
+        # One insert and one update per caller
+        assert client.insert.call_count == 5
+        assert client.update.call_count == 5